@@ -1,16 +1,27 @@
 import streamlit as st
+from contextlib import nullcontext
 
-from src.db import init_db, get_user_by_username
+from src.db import init_db, use_connection
 from src.auth import get_authenticator, render_signup
 from src.config import CATEGORIES
-from src.state import enforce_guest_on_refresh
+from src.state import (
+    begin_request,
+    enforce_guest_on_refresh,
+    get_current_user,
+    get_guest_db,
+    guest_usage,
+    is_admin,
+)
 
 from src.features.add_entry import render_add_entry_tab
+from src.features.import_entries import render_import_tab
 from src.features.transactions import render_transactions_tab
 from src.features.dashboard import render_dashboard_tab
+from src.features.debug_panel import render_debug_panel
 
 st.set_page_config(page_title="Finance Tracker", page_icon="💸", layout="wide")
 init_db()
+begin_request()
 
 # -------------------- Auth --------------------
 authenticator = get_authenticator()
@@ -30,7 +41,7 @@ with top_right:
     username = st.session_state.get("username")
 
     if auth_status is True and username:
-        user_row = get_user_by_username(username)
+        user_row = get_current_user()
         display_name = user_row["name"] if user_row and user_row["name"] else username
 
         st.markdown(f"Signed in as: **{display_name}**")
@@ -59,30 +70,49 @@ with top_right:
 # -------------------- Mode detection --------------------
 logged_in = st.session_state.get("authentication_status") is True
 user_id = None
+data_scope = nullcontext()
 
 if logged_in:
-    user_row = get_user_by_username(st.session_state.get("username"))
+    user_row = get_current_user()
     if not user_row:
         st.error("User not found in database. Please contact support.")
         st.stop()
     user_id = int(user_row["id"])
 
 if not logged_in:
+    # Guests get a private in-memory database; everything below reads and
+    # writes it through the normal src.db helpers.
+    guest_conn, user_id = get_guest_db()
+    data_scope = use_connection(guest_conn)
+
+    usage = guest_usage()
     st.info(
         "Guest mode: your data is temporary. Log in to save your records.", icon="ℹ️"
     )
+    st.caption(
+        f"Guest session: {usage['rows']:,} of {usage['max_rows']:,} entries, "
+        f"{usage['bytes'] / 1024:,.0f} KB in memory."
+    )
+
+tabs = st.tabs(["➕ Add Entry", "📄 Transactions", "📊 Dashboard", "📥 Import"])
 
-tabs = st.tabs(["➕ Add Entry", "📄 Transactions", "📊 Dashboard"])
+with data_scope:
+    # -------------------- Add Entry --------------------
+    with tabs[0]:
+        render_add_entry_tab(logged_in=logged_in, user_id=user_id, categories=CATEGORIES)
 
-# -------------------- Add Entry --------------------
-with tabs[0]:
-    render_add_entry_tab(logged_in=logged_in, user_id=user_id, categories=CATEGORIES)
+    # -------------------- Transactions --------------------
+    with tabs[1]:
+        render_transactions_tab(logged_in=logged_in, user_id=user_id, categories=CATEGORIES)
 
-# -------------------- Transactions --------------------
-with tabs[1]:
-    render_transactions_tab(logged_in=logged_in, user_id=user_id, categories=CATEGORIES)
+    # -------------------- Dashboard --------------------
+    with tabs[2]:
+        render_dashboard_tab(logged_in=logged_in, user_id=user_id)
 
-# -------------------- Dashboard --------------------
-with tabs[2]:
-    render_dashboard_tab(logged_in=logged_in, user_id=user_id)
+    # -------------------- Import --------------------
+    with tabs[3]:
+        render_import_tab(logged_in=logged_in, user_id=user_id)
 
+# -------------------- Admin debug panel --------------------
+if logged_in and is_admin():
+    render_debug_panel()
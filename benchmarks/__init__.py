@@ -0,0 +1,5 @@
+"""
+Benchmarks for the app's hot paths.
+
+    python -m benchmarks.run --sizes 1k,100k,1M --out results.json
+"""
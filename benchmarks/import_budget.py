@@ -0,0 +1,101 @@
+"""
+Startup import check for app.py.
+
+Imports everything app.py imports (in a fresh interpreter, under
+-X importtime) and fails if the total goes over the budget or if a module
+that should only load on first use (ReportLab, matplotlib) was pulled in.
+
+    python -m benchmarks.import_budget --budget-ms 1200
+"""
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+DEFAULT_BUDGET_MS = 1200.0
+# Only needed by the export buttons; must not be imported at startup
+LAZY_MODULES = ("reportlab", "matplotlib")
+
+
+def startup_modules(app_path: Path = APP_PATH) -> list[str]:
+    """Top-level modules imported by app.py, in order."""
+    tree = ast.parse(app_path.read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure_startup(modules: list[str], cwd: Path) -> tuple[float, list[tuple[str, float]], list[str]]:
+    """
+    Returns (total_ms, [(module, cumulative_ms)] for the top-level imports,
+    lazy modules that got loaded).
+    """
+    code = "\n".join(
+        [f"import {m}" for m in modules]
+        + ["import sys", f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"]
+    )
+    stderr, stdout = _run_importtime(code, cwd)
+    # Modules the bare interpreter imports (site, encodings, ...) don't count
+    baseline = {name for name, _ in _top_level_imports(_run_importtime("pass", cwd)[0])}
+    top_level = [(name, ms) for name, ms in _top_level_imports(stderr) if name not in baseline]
+
+    loaded = [m for m in stdout.strip().split(",") if m]
+    return sum(ms for _, ms in top_level), top_level, loaded
+
+
+def _run_importtime(code: str, cwd: Path) -> tuple[str, str]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stderr, proc.stdout
+
+
+def _top_level_imports(importtime_log: str) -> list[tuple[str, float]]:
+    top_level = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under their parent
+        if not name[1:].startswith(" "):
+            top_level.append((name.strip(), int(cumulative_us) / 1000))
+    return top_level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_budget", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to try; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    modules = startup_modules()
+    runs = [measure_startup(modules, APP_PATH.parent) for _ in range(max(args.runs, 1))]
+    total_ms, top_level, loaded = min(runs, key=lambda r: r[0])
+
+    print(f"app.py startup imports: {total_ms:,.0f} ms (budget {args.budget_ms:,.0f} ms)")
+    for name, ms in sorted(top_level, key=lambda t: t[1], reverse=True)[: args.top]:
+        print(f"  {ms:>8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: loaded at startup but should be lazy: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+from datetime import date
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src.config import CATEGORIES
+from src.db import add_transactions_bulk, create_user
+
+# Relative frequency of each category in a synthetic ledger (missing = 1.0)
+CATEGORY_WEIGHTS = {
+    "Income": 0.6,
+    "Investments": 0.3,
+    "Rent": 0.3,
+    "Groceries": 4.0,
+    "Dining": 3.0,
+    "Transportation": 1.5,
+    "Gas": 1.5,
+    "Shopping": 2.5,
+    "Bills": 1.0,
+    "Entertainment": 1.2,
+    "Health": 0.5,
+    "Other": 0.8,
+}
+
+# Typical amount (dollars) per category; amounts are log-normal around it
+CATEGORY_AMOUNTS = {
+    "Income": 2500.0,
+    "Investments": 500.0,
+    "Rent": 1800.0,
+    "Groceries": 60.0,
+    "Dining": 25.0,
+    "Transportation": 15.0,
+    "Gas": 45.0,
+    "Shopping": 70.0,
+    "Bills": 120.0,
+    "Entertainment": 30.0,
+    "Health": 80.0,
+    "Other": 40.0,
+}
+
+MERCHANTS_PER_CATEGORY = 40
+NOTES_RATE = 0.3
+NOTE_WORDS = [
+    "weekly", "monthly", "gift", "refund", "trip", "family", "work", "lunch",
+    "dinner", "coffee", "subscription", "annual", "split", "reimbursed", "cash",
+]
+
+INSERT_BATCH_ROWS = 50_000
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '100k' -> 100000, '1M' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if scale != 1 else text
+    return int(float(number) * scale)
+
+
+def generate_ledger(
+    rows: int,
+    years: int = 3,
+    end_year: Optional[int] = None,
+    seed: int = 0,
+    batch_rows: int = INSERT_BATCH_ROWS,
+) -> Iterator[list[tuple]]:
+    """
+    Yield batches of synthetic transactions for one user as
+    (date, amount_cents, category, merchant, notes) tuples, the shape
+    add_transactions_bulk takes. Dates are uniform over the last `years`
+    calendar years; merchants follow a Zipf-like popularity per category.
+    """
+    rng = np.random.default_rng(seed)
+    end_year = end_year or date.today().year
+    first = np.datetime64(f"{end_year - years + 1:04d}-01-01", "D")
+    span_days = (np.datetime64(f"{end_year + 1:04d}-01-01", "D") - first).astype(int)
+
+    categories = np.array(CATEGORIES, dtype=object)
+    weights = np.array([CATEGORY_WEIGHTS.get(c, 1.0) for c in CATEGORIES])
+    weights /= weights.sum()
+    typical = np.array([CATEGORY_AMOUNTS.get(c, 40.0) for c in CATEGORIES])
+
+    popularity = 1.0 / np.arange(1, MERCHANTS_PER_CATEGORY + 1)
+    popularity /= popularity.sum()
+    note_words = np.array(NOTE_WORDS, dtype=object)
+
+    remaining = rows
+    while remaining > 0:
+        n = min(batch_rows, remaining)
+        remaining -= n
+
+        days = first + rng.integers(0, span_days, size=n).astype("timedelta64[D]")
+        cat_idx = rng.choice(len(categories), size=n, p=weights)
+        cents = np.maximum(
+            np.rint(typical[cat_idx] * rng.lognormal(0.0, 0.5, size=n) * 100), 1
+        ).astype(np.int64)
+        merchant_idx = rng.choice(MERCHANTS_PER_CATEGORY, size=n, p=popularity)
+
+        has_note = rng.random(size=n) < NOTES_RATE
+        notes = np.where(
+            has_note,
+            note_words[rng.integers(0, len(note_words), size=n)]
+            + " "
+            + note_words[rng.integers(0, len(note_words), size=n)],
+            None,
+        )
+
+        yield [
+            (str(d), int(c), category, f"{category} Merchant {m + 1}", note)
+            for d, c, category, m, note in zip(
+                days.astype(str), cents, categories[cat_idx], merchant_idx, notes
+            )
+        ]
+
+
+def populate_db(rows: int, users: int = 1, years: int = 3, seed: int = 0) -> list[int]:
+    """
+    Create `users` synthetic users in the current database (src.db.DB_PATH)
+    and split `rows` transactions evenly between them. Returns the user ids.
+    """
+    user_ids = []
+    for i in range(users):
+        user_id = create_user(f"bench_user_{i + 1}", f"Bench User {i + 1}", "", "")
+        per_user = rows // users + (1 if i < rows % users else 0)
+        for batch in generate_ledger(per_user, years=years, seed=seed + i):
+            add_transactions_bulk(user_id, batch)
+        user_ids.append(user_id)
+    return user_ids
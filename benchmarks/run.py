@@ -0,0 +1,171 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import src.db as db
+from src.analytics import load_transactions_df, monthly_summary, rows_to_df
+from src.exports.csv_export import build_transactions_export_csv
+from src.exports.pdf_report import build_dashboard_pdf_bytes
+from src.recurring import run_recurring_batch
+from src.utils.dates import month_label
+
+from benchmarks.ledger import parse_size, populate_db
+
+DEFAULT_SIZES = "1k,100k,1M"
+
+
+def measure(fn, repeat: int = 3) -> tuple[dict, object]:
+    """
+    Best and mean wall time over `repeat` runs, then one extra run under
+    tracemalloc for peak Python/NumPy allocation (kept separate so tracing
+    does not skew the timings). Returns (stats, last result).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_s": min(times),
+        "mean_s": sum(times) / len(times),
+        "runs": repeat,
+        "peak_bytes": peak,
+    }, result
+
+
+def bench_size(rows: int, users: int, years: int, repeat: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="finance-bench-") as tmp:
+        db.close_pool()
+        db.DB_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+
+        t0 = time.perf_counter()
+        user_ids = populate_db(rows, users=users, years=years, seed=seed)
+        populate_s = time.perf_counter() - t0
+        user_id = user_ids[0]
+
+        cases = {}
+
+        cases["fetch_transactions"], tx_rows = measure(lambda: db.fetch_transactions(user_id), repeat)
+        cases["rows_to_df"], _ = measure(lambda: rows_to_df(tx_rows), repeat)
+        cases["load_transactions_df"], df = measure(lambda: load_transactions_df(user_id), repeat)
+
+        month_key = df["date"].max().strftime("%Y-%m")
+        cases["monthly_summary"], summary = measure(lambda: monthly_summary(df, month_key), repeat)
+        cases["build_transactions_export_csv"], _ = measure(
+            lambda: build_transactions_export_csv(df, "all"), repeat
+        )
+
+        by_cat, by_day, total_income, total_expenses, net, _remaining = summary
+        cases["build_dashboard_pdf_bytes"], _ = measure(
+            lambda: build_dashboard_pdf_bytes(
+                selected_label=month_label(month_key),
+                total_income=total_income,
+                total_expenses=total_expenses,
+                net=net,
+                by_cat=by_cat,
+                by_day=by_day,
+            ),
+            repeat,
+        )
+        # Whole database (every user), as the nightly batch runs it
+        cases["run_recurring_batch"], _ = measure(run_recurring_batch, repeat)
+
+        del tx_rows, df
+        db.close_pool()
+
+    return {
+        "rows": rows,
+        "users": users,
+        "years": years,
+        "rows_benchmarked": int(rows // users + (1 if rows % users else 0)),
+        "populate_s": populate_s,
+        "cases": cases,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def _print_table(result: dict):
+    print(f"\n{result['rows']:,} rows ({result['users']} user(s), populate {result['populate_s']:.2f}s)")
+    print(f"  {'case':<32} {'best (ms)':>12} {'mean (ms)':>12} {'peak (MiB)':>12}")
+    for name, stats in result["cases"].items():
+        print(
+            f"  {name:<32} {stats['best_s'] * 1000:>12.1f} {stats['mean_s'] * 1000:>12.1f}"
+            f" {stats['peak_bytes'] / (1024 * 1024):>12.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Time the app's hot paths on synthetic ledgers of several sizes.",
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated row counts (default {DEFAULT_SIZES})")
+    parser.add_argument("--users", type=int, default=1, help="users to split each ledger between (first one is timed)")
+    parser.add_argument("--years", type=int, default=3, help="years of history in each ledger")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results to this file (default: stdout only)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    original_path = db.DB_PATH
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "sqlite": db.sqlite3.sqlite_version,
+        "results": [],
+    }
+    try:
+        for rows in sizes:
+            result = bench_size(rows, args.users, args.years, args.repeat, args.seed)
+            report["results"].append(result)
+            _print_table(result)
+    finally:
+        db.DB_PATH = original_path
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(payload + "\n", encoding="utf-8")
+        print(f"\nWrote {args.out}")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
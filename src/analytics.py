@@ -1,37 +1,152 @@
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
+from src.db import (
+    fetch_month_daily_totals,
+    fetch_month_rollups,
+    fetch_monthly_category_totals,
+    fetch_transaction_columns,
+)
+from src.utils.dates import is_month_key, month_bounds, parse_iso_dates
+from src.utils.money import to_cents_array
+
+
+def _empty_transactions_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": pd.Series(dtype="int64"),
+            "user_id": pd.Series(dtype="int64"),
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "amount": pd.Series(dtype="float64"),
+            "amount_cents": pd.Series(dtype="int64"),
+            "category": pd.Series(dtype="category"),
+            "merchant": pd.Series(dtype=object),
+            "notes": pd.Series(dtype=object),
+            "created_at": pd.Series(dtype=object),
+        }
+    )
+
+
+def _int_column(values, n: int) -> np.ndarray:
+    try:
+        return np.fromiter(values, dtype=np.int64, count=n)
+    except TypeError:  # NULLs
+        return np.array(values, dtype=object)
+
+
+def columns_to_df(columns, rows: list[tuple]) -> pd.DataFrame:
+    """
+    Build a typed transactions DataFrame straight from plain-tuple rows
+    (e.g. src.db.fetch_transaction_columns) by transposing once into columns:
+      date -> datetime64[ns], category -> category dtype,
+      amount_cents -> int64 (exact), amount -> float64 dollars derived from it.
+
+    Rows whose date does not parse are dropped. There is no date_display
+    column; format only the rows you show (src.utils.dates.display_dates).
+    """
+    if not rows:
+        return _empty_transactions_df()
+
+    n = len(rows)
+    raw = dict(zip(columns, zip(*rows)))
+    data = {}
+    for name, values in raw.items():
+        if name == "date":
+            data[name] = parse_iso_dates(values).astype("datetime64[ns]")
+        elif name in ("id", "user_id", "amount_cents"):
+            data[name] = _int_column(values, n)
+        elif name == "category":
+            data[name] = pd.Categorical(values)
+        elif name in ("merchant", "notes", "created_at"):
+            data[name] = np.array(values, dtype=object)
+        elif name != "amount":
+            data[name] = pd.Series(values)
+
+    if "amount_cents" not in data or data["amount_cents"].dtype != np.int64:
+        data["amount_cents"] = to_cents_array(pd.Series(raw["amount"], dtype="float64"))
+    data["amount"] = data["amount_cents"] / 100
+
+    for name in ("id", "user_id", "merchant", "notes", "created_at"):
+        if name not in data:
+            data[name] = np.full(n, None, dtype=object)
+
+    df = pd.DataFrame(data, copy=False)
+    valid = ~np.isnat(df["date"].to_numpy())
+    if not valid.all():
+        df = df[valid].reset_index(drop=True)
+    return df
+
 
 def rows_to_df(rows):
     """
-    Accepts:
-      - sqlite3.Row rows from DB (dict-like)
-      - OR list of dicts from guest session
-    Returns a DataFrame with:
-      id, user_id (optional), date (datetime), date_display, amount, category, merchant, notes, created_at
+    Accepts sqlite3.Row rows from the DB (or dicts) and returns the same typed
+    DataFrame as columns_to_df. Prefer load_transactions_df for whole ranges:
+    it skips the per-row Row objects entirely.
     """
     if not rows:
-        return pd.DataFrame(
-            columns=["id", "user_id", "date", "amount", "category", "merchant", "notes", "created_at", "date_display"]
-        )
+        return _empty_transactions_df()
 
-    df = pd.DataFrame([dict(r) for r in rows])
+    first = rows[0]
+    if isinstance(first, dict):
+        columns = list(dict.fromkeys(k for r in rows for k in r))
+        tuples = [tuple(r.get(c) for c in columns) for r in rows]
+    else:
+        columns = tuple(first.keys())
+        tuples = [tuple(r) for r in rows]
+    return columns_to_df(columns, tuples)
 
-    for col in ["id", "user_id", "created_at", "merchant", "notes"]:
-        if col not in df.columns:
-            df[col] = None
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+def load_transactions_df(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> pd.DataFrame:
+    """A user's transactions (optionally start_date <= date < end_date), newest first, as a typed DataFrame."""
+    return columns_to_df(*fetch_transaction_columns(user_id, start_date, end_date))
 
-    # If any date failed parsing, drop those rows (prevents .dt errors)
-    df = df.dropna(subset=["date"]).copy()
 
-    # Display-only date column
-    df["date_display"] = df["date"].dt.strftime("%m/%d/%Y")
+def _summarize_cents(category: pd.Series, day: pd.Series, cents: np.ndarray):
+    """
+    Shared int64 aggregation for monthly_summary and summary_from_daily_totals.
+    category/day describe each row (day as datetime.date), cents is int64.
+    Dollars are produced only at the end.
+    """
+    empty_cat = pd.DataFrame(columns=["category", "amount"])
+    empty_day = pd.DataFrame(columns=["day", "amount"])
 
-    # Amount numeric
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+    is_income = (category == "Income").to_numpy()
+    income_cents = int(cents[is_income].sum())
+    expense_cents = int(cents[~is_income].sum())
 
-    return df
+    total_income = income_cents / 100
+    total_expenses = expense_cents / 100
+    net = (income_cents - expense_cents) / 100
+    remaining = net
+
+    if is_income.all():
+        return empty_cat, empty_day, total_income, total_expenses, net, remaining
+
+    exp = pd.DataFrame(
+        {
+            "category": category.to_numpy()[~is_income],
+            "day": day.to_numpy()[~is_income],
+            "cents": cents[~is_income],
+        }
+    )
+
+    by_cat_expenses = (
+        exp.groupby("category", as_index=False)["cents"]
+        .sum()
+        .sort_values("cents", ascending=False)
+    )
+    by_cat_expenses = by_cat_expenses.assign(amount=by_cat_expenses["cents"] / 100)[["category", "amount"]]
+
+    by_day_expenses = exp.groupby("day", as_index=False)["cents"].sum()
+    by_day_expenses = by_day_expenses.assign(amount=by_day_expenses["cents"] / 100)[["day", "amount"]]
+
+    return by_cat_expenses, by_day_expenses, total_income, total_expenses, net, remaining
 
 
 def monthly_summary(df: pd.DataFrame, month_key: str):
@@ -52,37 +167,243 @@ def monthly_summary(df: pd.DataFrame, month_key: str):
     if df.empty:
         return empty_cat, empty_day, 0.0, 0.0, 0.0, 0.0
 
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
 
-    df_m = df[df["date"].dt.strftime("%Y-%m") == month_key].copy()
-    if df_m.empty:
+    # Range compare on the datetime column instead of formatting every row
+    start, end = month_bounds(month_key)
+    in_month = ((dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))).to_numpy()
+    if not in_month.any():
         return empty_cat, empty_day, 0.0, 0.0, 0.0, 0.0
 
-    income_df = df_m[df_m["category"] == "Income"].copy()
-    exp_df = df_m[df_m["category"] != "Income"].copy()
+    if "amount_cents" in df.columns:
+        cents = df["amount_cents"].to_numpy(dtype="int64")[in_month]
+    else:
+        cents = to_cents_array(df["amount"])[in_month]
+
+    return _summarize_cents(
+        df["category"][in_month],
+        dates[in_month].dt.date,
+        cents,
+    )
 
-    total_income = float(income_df["amount"].sum()) if not income_df.empty else 0.0
-    total_expenses = float(exp_df["amount"].sum()) if not exp_df.empty else 0.0
 
-    net = total_income - total_expenses
-    remaining = net
+def monthly_summary_sql(user_id: int, month_key: str, use_rollups: bool = True):
+    """
+    SQL-backed monthly_summary for a stored user: the month is aggregated in
+    SQLite (monthly_rollups, or GROUP BY over the indexed transactions range
+    when use_rollups=False) and only per-day/category totals reach pandas.
 
-    by_cat_expenses = (
-        exp_df.groupby("category", as_index=False)["amount"]
-        .sum()
-        .sort_values("amount", ascending=False)
-        if not exp_df.empty
-        else empty_cat
+    Returns the same tuple as monthly_summary.
+    """
+    if use_rollups:
+        rows = fetch_month_rollups(user_id, month_key)
+    else:
+        rows = fetch_month_daily_totals(user_id, month_key)
+    return summary_from_daily_totals(rows)
+
+
+def summary_from_daily_totals(rows):
+    """
+    rows: (category, day, amount_cents, tx_count) rows for a single month, from
+    src.db.fetch_month_rollups or src.db.fetch_month_daily_totals.
+
+    Returns the same tuple as monthly_summary.
+    """
+    if not rows:
+        return (
+            pd.DataFrame(columns=["category", "amount"]),
+            pd.DataFrame(columns=["day", "amount"]),
+            0.0, 0.0, 0.0, 0.0,
+        )
+
+    r = pd.DataFrame([tuple(x) for x in rows], columns=["category", "day", "amount_cents", "tx_count"])
+    # Days that don't parse (malformed stored dates) are skipped
+    days = pd.to_datetime(r["day"], errors="coerce")
+    valid = days.notna()
+    return _summarize_cents(
+        r["category"][valid],
+        days[valid].dt.date,
+        r["amount_cents"][valid].to_numpy(dtype="int64"),
     )
 
-    by_day_expenses = (
-        exp_df.assign(day=exp_df["date"].dt.date)
-        .groupby("day", as_index=False)["amount"]
-        .sum()
-        if not exp_df.empty
-        else empty_day
+
+# Budgets
+BUDGET_WARN_RATIO = 0.8
+
+
+def budget_status(rows) -> pd.DataFrame:
+    """
+    rows: (month, category, budget_cents, actual_cents) rows from
+    src.db.fetch_budget_vs_actual, for any number of months.
+
+    One vectorized pass over all of them. Returns month, category, budget,
+    actual, remaining (dollars), used (actual / budget), over (spent more
+    than the budget) and near (at least BUDGET_WARN_RATIO used, not over).
+    """
+    columns = ["month", "category", "budget", "actual", "remaining", "used", "over", "near"]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    r = pd.DataFrame([tuple(x) for x in rows], columns=["month", "category", "budget_cents", "actual_cents"])
+    budget = r["budget_cents"].to_numpy(dtype="int64")
+    actual = r["actual_cents"].to_numpy(dtype="int64")
+
+    safe_budget = np.where(budget > 0, budget, 1)
+    used = np.where(budget > 0, actual / safe_budget, np.where(actual > 0, np.inf, 0.0))
+    over = actual > budget
+
+    return pd.DataFrame(
+        {
+            "month": r["month"],
+            "category": r["category"],
+            "budget": budget / 100,
+            "actual": actual / 100,
+            "remaining": (budget - actual) / 100,
+            "used": used,
+            "over": over,
+            "near": ~over & (used >= BUDGET_WARN_RATIO),
+        }
+    )[columns]
+
+
+# Trends
+TREND_WINDOWS = (3, 6, 12)
+
+
+def month_category_matrix(rows):
+    """
+    rows: (month, category, amount_cents) rows, e.g. from
+    src.db.fetch_monthly_category_totals.
+
+    Scatters them in one pass into a dense int64 matrix with a row for every
+    calendar month from the first to the last (gaps are zeros) and a column
+    per category. Rows with a malformed month key are skipped. Returns
+    (month_keys, categories, cents).
+    """
+    rows = [tuple(r) for r in rows if is_month_key(r[0])]
+    if not rows:
+        return [], [], np.zeros((0, 0), dtype=np.int64)
+
+    months, categories, cents = zip(*rows)
+    month_idx = np.array(months, dtype="datetime64[M]").astype(np.int64)
+    first = int(month_idx.min())
+    n_months = int(month_idx.max()) - first + 1
+    cat_names, cat_idx = np.unique(np.array(categories, dtype=object).astype(str), return_inverse=True)
+
+    matrix = np.zeros((n_months, len(cat_names)), dtype=np.int64)
+    np.add.at(matrix, (month_idx - first, cat_idx), np.fromiter(cents, dtype=np.int64, count=len(cents)))
+
+    month_keys = np.arange(first, first + n_months).astype("datetime64[M]").astype(str).tolist()
+    return month_keys, cat_names.tolist(), matrix
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` rows (axis 0) via a cumulative sum; NaN until the window is full."""
+    csum = np.cumsum(np.concatenate([np.zeros((1,) + values.shape[1:]), values]), axis=0)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def _year_over_year(month_keys: list[str], categories: list[str], matrix: np.ndarray) -> pd.DataFrame:
+    """
+    Per year and category: the total, and the previous year's total over the
+    same calendar months (so a partial current year is compared like for
+    like). prev/change are NaN where the previous year did not cover them.
+    """
+    first_year, first_month = int(month_keys[0][:4]), int(month_keys[0][5:7])
+    lead = first_month - 1
+    trail = (-(lead + len(month_keys))) % 12
+    n_years = (lead + len(month_keys) + trail) // 12
+
+    cube = np.pad(matrix, ((lead, trail), (0, 0))).reshape(n_years, 12, len(categories))
+    observed = np.pad(np.ones(len(month_keys), dtype=bool), (lead, trail)).reshape(n_years, 12)
+
+    totals = cube.sum(axis=1)
+    prev = np.full(totals.shape, np.nan)
+    if n_years > 1:
+        comparable = (observed[:-1] | ~observed[1:]).all(axis=1)
+        prev[1:] = (cube[:-1] * observed[1:, :, None]).sum(axis=1)
+        prev[1:][~comparable] = np.nan
+
+    years = np.repeat(np.arange(first_year, first_year + n_years), len(categories))
+    amount = totals.ravel() / 100
+    prev_amount = prev.ravel() / 100
+    change = amount - prev_amount
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(prev_amount > 0, change / prev_amount, np.nan)
+
+    return pd.DataFrame(
+        {
+            "year": years,
+            "category": np.tile(categories, n_years),
+            "amount": amount,
+            "prev_amount": prev_amount,
+            "change": change,
+            "change_pct": change_pct,
+        }
     )
 
-    return by_cat_expenses, by_day_expenses, total_income, total_expenses, net, remaining
+
+def trend_analytics(rows) -> dict:
+    """
+    rows: (month, category, amount_cents) rows for a user's whole history.
+
+    Everything is derived from one month x category matrix, with no per-month
+    loop. Returns a dict of DataFrames (dollars, indexed by month_key where
+    monthly):
+      monthly: income, expenses, net, savings_rate (net / income) and
+        savings_rate_12m, plus expenses_avg_{w} for w in TREND_WINDOWS
+      category: expenses per month and category (Income excluded)
+      category_avg_{w}: trailing w-month averages of `category`
+      yoy: year, category, amount, prev_amount, change, change_pct
+    """
+    month_keys, categories, matrix = month_category_matrix(rows)
+    if not month_keys:
+        return {}
+
+    is_income = np.array([c == "Income" for c in categories], dtype=bool)
+    income = matrix[:, is_income].sum(axis=1)
+    expenses = matrix[:, ~is_income].sum(axis=1)
+    net = income - expenses
+
+    def _ratio(num, den):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+    index = pd.Index(month_keys, name="month_key")
+    monthly = pd.DataFrame(
+        {
+            "income": income / 100,
+            "expenses": expenses / 100,
+            "net": net / 100,
+            "savings_rate": _ratio(net, income),
+            "savings_rate_12m": _ratio(
+                _rolling_mean(net.astype(float), 12), _rolling_mean(income.astype(float), 12)
+            ),
+        },
+        index=index,
+    )
+    for w in TREND_WINDOWS:
+        monthly[f"expenses_avg_{w}"] = _rolling_mean(expenses.astype(float), w) / 100
+
+    expense_cats = [c for c, inc in zip(categories, is_income) if not inc]
+    expense_matrix = matrix[:, ~is_income]
+    result = {
+        "monthly": monthly,
+        "category": pd.DataFrame(expense_matrix / 100, index=index, columns=expense_cats),
+        "yoy": _year_over_year(month_keys, categories, matrix),
+    }
+    for w in TREND_WINDOWS:
+        result[f"category_avg_{w}"] = pd.DataFrame(
+            _rolling_mean(expense_matrix.astype(float), w) / 100, index=index, columns=expense_cats
+        )
+    return result
+
+
+def load_trends(user_id: int) -> dict:
+    """trend_analytics over the user's full history (aggregated in SQLite)."""
+    return trend_analytics(fetch_monthly_category_totals(user_id))
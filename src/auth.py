@@ -1,20 +1,100 @@
 import re
+import threading
 import streamlit as st
 import streamlit_authenticator as stauth
 
-from src.db import fetch_users, user_exists, create_user
+from src.db import USERS_VERSION_KEY, get_user_by_username, get_version, user_exists, create_user
+
+
+class _CredentialsCache:
+    """
+    Process-wide username -> credentials entry cache, filled one user at a
+    time. Cleared whenever the users version stamp in the database changes
+    (create_user bumps it), so every server process sees new accounts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+
+    def sync(self):
+        version = get_version(USERS_VERSION_KEY)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def get(self, username: str):
+        key = username.strip().lower()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        row = get_user_by_username(key)
+        if row is None:
+            return None
+
+        entry = {
+            "name": row["name"],
+            "email": row["email"],
+            "password": row["password_hash"],
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
 
 
-def build_credentials_from_db():
-    users = fetch_users()
-    usernames = {}
-    for u in users:
-        usernames[u["username"]] = {
-            "name": u["name"],
-            "email": u["email"],
-            "password": u["password_hash"],
-        }
-    return {"usernames": usernames}
+_credentials_cache = _CredentialsCache()
+
+
+class _SessionCredentials(dict):
+    """
+    The credentials["usernames"] mapping handed to streamlit-authenticator.
+
+    Entries are copied in from the process-wide cache on first lookup, so the
+    per-session state the authenticator writes into them (logged_in, failed
+    login attempts) stays private to the session.
+    """
+
+    def _load(self, username) -> bool:
+        if not isinstance(username, str):
+            return False
+        entry = _credentials_cache.get(username)
+        if entry is None:
+            return False
+        dict.__setitem__(self, username, dict(entry))
+        return True
+
+    def __contains__(self, username):
+        return dict.__contains__(self, username) or self._load(username)
+
+    def __missing__(self, username):
+        if self._load(username):
+            return dict.__getitem__(self, username)
+        raise KeyError(username)
+
+    def __bool__(self):
+        # Users exist in the database even if none were looked up yet.
+        return True
+
+
+def invalidate_credentials_cache():
+    _credentials_cache.invalidate()
+
+
+def get_credentials():
+    """Per-session lazy credentials dict for stauth.Authenticate."""
+    _credentials_cache.sync()
+    if not isinstance(st.session_state.get("auth_credentials"), _SessionCredentials):
+        st.session_state["auth_credentials"] = _SessionCredentials()
+    return {"usernames": st.session_state["auth_credentials"]}
 
 
 def get_authenticator():
@@ -22,13 +102,18 @@ def get_authenticator():
     cookie_key = st.secrets.get("auth", {}).get("cookie_key", "CHANGE_ME_TO_A_LONG_RANDOM_SECRET")
     cookie_expiry_days = int(st.secrets.get("auth", {}).get("cookie_expiry_days", 30))
 
-    credentials = build_credentials_from_db()
+    credentials = get_credentials()
+
+    # Skip the authenticator's one-time pass over every user (lower-casing keys
+    # and auto-hashing); our mapping is already lower-cased and pre-hashed.
+    st.session_state["AuthenticationService.__init__"] = True
 
     authenticator = stauth.Authenticate(
         credentials=credentials,
         cookie_name=cookie_name,
         cookie_key=cookie_key,
         cookie_expiry_days=cookie_expiry_days,
+        auto_hash=False,
     )
     return authenticator
 
@@ -101,6 +186,7 @@ def render_signup(show_title: bool = True):
         email="",
         password_hash=password_hash,
     )
+    invalidate_credentials_cache()
 
     st.success("Account created! Please log in.")
     st.rerun()
@@ -12,3 +12,6 @@ CATEGORIES = [
     "Health",
     "Other",
 ]
+
+# Most transactions a guest session may hold in its in-memory database
+GUEST_MAX_ROWS = 5000
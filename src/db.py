@@ -1,85 +1,631 @@
+import atexit
+import itertools
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+from src import instrumentation
+from src.utils.dates import is_month_key, month_bounds
+from src.utils.money import to_cents
+
 DB_PATH = Path("data") / "finance.db"
 
+# Connection pool / pragma tuning
+POOL_SIZE = 8
+POOL_WAIT_TIMEOUT_S = 30.0
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 16 * 1024          # negative cache_size => KiB
+MMAP_SIZE_BYTES = 128 * 1024 * 1024
+
+
+# Instrumented connection: with src.instrumentation enabled, every statement
+# is timed (execute + fetches) and its row count recorded. When disabled the
+# overrides just defer to sqlite3.
+class TracedCursor(sqlite3.Cursor):
+    _record = None
+
+    def _timed(self, run, sql, *args):
+        self._record = record = instrumentation.start_query(sql)
+        t0 = time.perf_counter()
+        try:
+            return run(sql, *args)
+        finally:
+            record["ms"] += (time.perf_counter() - t0) * 1000
+            if self.rowcount > 0:
+                record["rows"] += self.rowcount
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        record = self._record
+        if record is None:
+            return super().fetchone()
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        record["ms"] += (time.perf_counter() - t0) * 1000
+        record["rows"] += row is not None
+        return row
+
+    def fetchmany(self, size=None):
+        record = self._record
+        if record is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        record["ms"] += (time.perf_counter() - t0) * 1000
+        record["rows"] += len(rows)
+        return rows
+
+    def fetchall(self):
+        record = self._record
+        if record is None:
+            return super().fetchall()
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        record["ms"] += (time.perf_counter() - t0) * 1000
+        record["rows"] += len(rows)
+        return rows
+
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracedCursor if instrumentation.is_enabled() else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if not instrumentation.is_enabled():
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not instrumentation.is_enabled():
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Pooled connections move between Streamlit script threads, but only
+    # one thread holds a connection at a time.
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=TracedConnection,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB};")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES};")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections to a single database file.
+
+    Idle connections are reused LIFO (warm page cache first). When every
+    connection is checked out, callers block until one is released.
+    """
+
+    def __init__(self, path: Path, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_time_s = 0.0
+
+    def acquire(self, timeout: float = POOL_WAIT_TIMEOUT_S) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._hits += 1
+                self._in_use += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+                self._misses += 1
+                self._in_use += 1
 
+        if can_create:
+            try:
+                return _connect(self.path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                    self._in_use -= 1
+                raise
+
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No SQLite connection available after {timeout:.1f}s (pool size {self.size})"
+            )
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._waits += 1
+            self._wait_time_s += waited
+            self._in_use += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self._hits + self._misses + self._waits
+            return {
+                "path": str(self.path),
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "wait_time_s": round(self._wait_time_s, 6),
+                "hit_rate": (self._hits / requests) if requests else 0.0,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        # Re-point the pool if DB_PATH was changed (tests, scripts).
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+@contextmanager
 def get_conn():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    """
+    Check out a pooled connection for the duration of the with-block.
+
+    Commits on success and rolls back on error (same as using a sqlite3
+    connection as a context manager). Nested calls on the same thread reuse
+    the connection that is already checked out. Inside use_connection(),
+    the given connection is used instead of the pool.
+    """
+    held = getattr(_local, "conn", None)
+    if held is not None:
+        _local.depth += 1
+        try:
+            yield held
+        finally:
+            _local.depth -= 1
+        return
+
+    override = getattr(_local, "override", None)
+    if override is not None:
+        _local.conn, _local.depth = override, 0
+        try:
+            with override:
+                yield override
+        finally:
+            _local.conn = None
+        return
+
+    pool = _get_pool()
+    conn = pool.acquire()
+    _local.conn, _local.depth = conn, 0
+    try:
+        with conn:
+            yield conn
+    finally:
+        _local.conn = None
+        pool.release(conn)
+
+
+@contextmanager
+def use_connection(conn: sqlite3.Connection):
+    """
+    Route every helper in this module to conn (instead of the pooled file
+    database) for the duration of the with-block, on the current thread.
+    Used for per-session in-memory guest databases.
+    """
+    previous = getattr(_local, "override", None)
+    _local.override = conn
+    try:
+        yield conn
+    finally:
+        _local.override = previous
+
+
+_memory_db_ids = itertools.count(1)
+
+
+def open_memory_db() -> sqlite3.Connection:
+    """A private :memory: database with the full app schema."""
+    conn = sqlite3.connect(":memory:", check_same_thread=False, factory=TracedConnection)
     conn.row_factory = sqlite3.Row
+    conn.db_key = f"memory:{next(_memory_db_ids)}"
+    conn.execute("PRAGMA foreign_keys = ON;")
+    with use_connection(conn):
+        init_db()
     return conn
 
 
+def database_key() -> str:
+    """Identifies the database helpers currently use (for cache keys)."""
+    override = getattr(_local, "override", None)
+    if override is not None:
+        return getattr(override, "db_key", f"conn:{id(override)}")
+    return str(DB_PATH)
+
+
+def database_size_bytes() -> int:
+    """page_count * page_size of the current database (memory used for :memory:)."""
+    with get_conn() as conn:
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return int(page_count) * int(page_size)
+
+
+def pool_stats() -> dict:
+    """Hit/miss/wait counters for the current connection pool."""
+    return _get_pool().stats()
+
+
+def close_pool():
+    """Close idle pooled connections (e.g. before replacing the DB file)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
     cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
     return any(c["name"] == column for c in cols)
 
 
-def init_db():
-    with get_conn() as conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
 
-        # Users table
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                name TEXT NOT NULL,
-                email TEXT NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            );
-            """
-        )
 
-        # Transactions table (per-user)
+_BUDGETS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        month TEXT NOT NULL,             -- YYYY-MM (first month, if recurring)
+        category TEXT NOT NULL,
+        budget_amount REAL NOT NULL,     -- dollars, kept for older readers
+        budget_cents INTEGER,            -- authoritative amount
+        recurring INTEGER NOT NULL DEFAULT 0,  -- 1 = applies to later months too
+        created_at TEXT NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        UNIQUE(user_id, month, category)
+    );
+"""
+
+
+def _budgets_unique_per_user(conn: sqlite3.Connection) -> bool:
+    """Early DBs had UNIQUE(month, category) on budgets, shared by every user."""
+    for index in conn.execute("PRAGMA index_list(budgets)").fetchall():
+        if not index["unique"]:
+            continue
+        cols = [c["name"] for c in conn.execute(f"PRAGMA index_info({index['name']})").fetchall()]
+        if cols == ["month", "category"]:
+            return False
+    return True
+
+
+def _rebuild_budgets_table(conn: sqlite3.Connection):
+    # A table constraint can't be altered in SQLite: copy into a new table
+    conn.execute("DROP TABLE IF EXISTS budgets_new;")
+    conn.execute(_BUDGETS_TABLE_SQL.format(name="budgets_new"))
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO budgets_new (id, user_id, month, category, budget_amount, budget_cents, created_at)
+        SELECT id, user_id, month, category, budget_amount,
+               CAST(ROUND(budget_amount * 100) AS INTEGER),
+               COALESCE(created_at, '')
+        FROM budgets
+        """
+    )
+    conn.execute("DROP TABLE budgets;")
+    conn.execute("ALTER TABLE budgets_new RENAME TO budgets;")
+
+
+# Schema migrations
+# PRAGMA user_version records the last migration applied. Each migration runs
+# once, in its own transaction, and is written to also upgrade databases from
+# before versioning (user_version 0 with some tables already present).
+# Append new migrations to the end; never edit or reorder shipped ones.
+def _migration_core_tables(conn: sqlite3.Connection):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            date TEXT NOT NULL,              -- YYYY-MM-DD
+            amount REAL NOT NULL,            -- dollars, kept for older readers
+            category TEXT NOT NULL,
+            merchant TEXT,
+            notes TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            month TEXT NOT NULL,             -- YYYY-MM
+            category TEXT NOT NULL,
+            budget_amount REAL NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id),
+            UNIQUE(user_id, month, category)
+        );
+        """
+    )
+    # Small key/value table for version stamps shared across processes
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        """
+    )
+
+    # Columns added after the first release
+    if not _column_exists(conn, "transactions", "user_id"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN user_id INTEGER;")
+    if not _column_exists(conn, "budgets", "user_id"):
+        conn.execute("ALTER TABLE budgets ADD COLUMN user_id INTEGER;")
+    if not _column_exists(conn, "budgets", "created_at"):
+        conn.execute("ALTER TABLE budgets ADD COLUMN created_at TEXT;")
+
+
+def _migration_indexes(conn: sqlite3.Connection):
+    # Case-insensitive username lookups (user_exists / get_user_by_username)
+    # filter on LOWER(username), which the UNIQUE index can't serve.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_username_lower "
+        "ON users(LOWER(username));"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_date "
+        "ON transactions(user_id, date);"
+    )
+
+
+def _migration_amount_cents(conn: sqlite3.Connection):
+    if not _column_exists(conn, "transactions", "amount_cents"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN amount_cents INTEGER;")
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                date TEXT NOT NULL,              -- YYYY-MM-DD
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                merchant TEXT,
-                notes TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            );
-            """
+            "UPDATE transactions SET amount_cents = CAST(ROUND(amount * 100) AS INTEGER);"
         )
 
-        # Budgets table (optional, per-user)
+
+def _migration_monthly_rollups(conn: sqlite3.Connection):
+    # Per (user, month, category, day) totals, maintained incrementally by the
+    # transaction write helpers. A copy from before integer cents is rebuilt.
+    if _table_exists(conn, "monthly_rollups") and not _column_exists(conn, "monthly_rollups", "amount_cents"):
+        conn.execute("DROP TABLE monthly_rollups;")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,             -- YYYY-MM
+            category TEXT NOT NULL,
+            day TEXT NOT NULL,               -- YYYY-MM-DD
+            amount_cents INTEGER NOT NULL,
+            tx_count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, month, category, day)
+        ) WITHOUT ROWID;
+        """
+    )
+    _rebuild_monthly_rollups(conn)
+
+
+def _migration_search_index(conn: sqlite3.Connection):
+    _init_search_index(conn)
+
+
+def _migration_budget_cents_recurring(conn: sqlite3.Connection):
+    if not _budgets_unique_per_user(conn):
+        _rebuild_budgets_table(conn)
+    if not _column_exists(conn, "budgets", "budget_cents"):
+        conn.execute("ALTER TABLE budgets ADD COLUMN budget_cents INTEGER;")
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS budgets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                month TEXT NOT NULL,             -- YYYY-MM
-                category TEXT NOT NULL,
-                budget_amount REAL NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                UNIQUE(user_id, month, category)
-            );
-            """
+            "UPDATE budgets SET budget_cents = CAST(ROUND(budget_amount * 100) AS INTEGER);"
         )
+    if not _column_exists(conn, "budgets", "recurring"):
+        conn.execute("ALTER TABLE budgets ADD COLUMN recurring INTEGER NOT NULL DEFAULT 0;")
 
-        # Migrations for older DBs
-        if not _column_exists(conn, "transactions", "user_id"):
-            conn.execute("ALTER TABLE transactions ADD COLUMN user_id INTEGER;")
 
-        if not _column_exists(conn, "budgets", "user_id"):
-            conn.execute("ALTER TABLE budgets ADD COLUMN user_id INTEGER;")
+def _migration_recurring_charges(conn: sqlite3.Connection):
+    # Output of the nightly recurring-charge detection (src.recurring)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recurring_charges (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            merchant TEXT NOT NULL,
+            category TEXT NOT NULL,
+            period TEXT NOT NULL,            -- weekly / monthly / annual
+            amount_cents INTEGER NOT NULL,   -- most recent charge
+            occurrences INTEGER NOT NULL,
+            first_date TEXT NOT NULL,
+            last_date TEXT NOT NULL,
+            next_date TEXT NOT NULL,         -- forecast
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        );
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_recurring_charges_user ON recurring_charges(user_id);"
+    )
 
-        if not _column_exists(conn, "budgets", "created_at"):
-            conn.execute("ALTER TABLE budgets ADD COLUMN created_at TEXT;")
 
-        conn.commit()
+def _migration_search_owner(conn: sqlite3.Connection):
+    # Rebuild the search index with the per-user owner column
+    for trigger in _SEARCH_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    conn.execute("DROP TABLE IF EXISTS transactions_fts;")
+    _init_search_index(conn)
+
+
+# user_version N means MIGRATIONS[:N] have been applied
+MIGRATIONS = [
+    _migration_core_tables,            # 1
+    _migration_indexes,                # 2
+    _migration_amount_cents,           # 3
+    _migration_monthly_rollups,        # 4
+    _migration_search_index,           # 5
+    _migration_budget_cents_recurring,  # 6
+    _migration_recurring_charges,      # 7
+    _migration_search_owner,           # 8
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# DB file whose schema this process has already confirmed up to date
+_schema_ready_for: Optional[Path] = None
+
+
+def init_db():
+    """
+    Bring the database up to SCHEMA_VERSION. Cheap to call on every rerun:
+    after the first call in a process it returns without touching SQLite,
+    and otherwise it is a single PRAGMA read when nothing is pending.
+    """
+    global _schema_ready_for
+    in_memory = getattr(_local, "override", None) is not None
+    if not in_memory and _schema_ready_for == DB_PATH:
+        return
+
+    with get_conn() as conn:
+        if int(conn.execute("PRAGMA user_version").fetchone()[0]) < SCHEMA_VERSION:
+            _run_migrations(conn)
+        _repair_search_index(conn)
+
+    if not in_memory:
+        _schema_ready_for = DB_PATH
+
+
+def _run_migrations(conn: sqlite3.Connection):
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        # BEGIN IMMEDIATE takes the write lock, so when several processes
+        # start at once only one applies each migration; the rest see the
+        # bumped user_version and skip it.
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            if int(conn.execute("PRAGMA user_version").fetchone()[0]) < version:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version};")
+            conn.execute("COMMIT;")
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+
+
+# Version stamps
+USERS_VERSION_KEY = "users_version"
+
+
+def _bump_version(conn: sqlite3.Connection, key: str):
+    conn.execute(
+        """
+        INSERT INTO app_meta (key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """,
+        (key,),
+    )
+
+
+def get_version(key: str) -> int:
+    """Current value of a version stamp (0 if it was never bumped)."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+# Bumped in the same transaction as every write to a user's transactions or
+# budgets, so cached reads keyed on it can never outlive the data they saw.
+def _data_version_key(user_id: int) -> str:
+    return f"data_version:{user_id}"
+
+
+def _bump_data_version(conn: sqlite3.Connection, user_id: int):
+    if user_id is not None:
+        _bump_version(conn, _data_version_key(user_id))
+
+
+def get_data_version(user_id: int) -> int:
+    return get_version(_data_version_key(user_id))
+
+
+def fetch_data_versions() -> dict[int, int]:
+    """{user_id: data version} for every user whose data was ever written."""
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT key, value FROM app_meta WHERE key LIKE 'data_version:%'"
+        ).fetchall()
+    return {int(k.split(":", 1)[1]): int(v) for k, v in rows}
 
 
 # User helpers
@@ -102,6 +648,7 @@ def create_user(username: str, name: str, email: str, password_hash: str) -> int
             """,
             (username.strip(), name.strip(), email.strip(), password_hash, created_at),
         )
+        _bump_version(conn, USERS_VERSION_KEY)
         conn.commit()
         return int(cur.lastrowid)
 
@@ -121,7 +668,34 @@ def fetch_users():
     return rows
 
 
+def fetch_user_ids() -> set[int]:
+    with get_conn() as conn:
+        rows = conn.execute("SELECT id FROM users").fetchall()
+    return {int(r[0]) for r in rows}
+
+
 # Transactions
+_INSERT_TRANSACTION_SQL = """
+    INSERT INTO transactions (user_id, date, amount, amount_cents, category, merchant, notes, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _insert_transactions(conn: sqlite3.Connection, params: list[tuple]):
+    """
+    params: (user_id, date, amount, amount_cents, category, merchant, notes,
+    created_at) tuples, possibly for several users. One executemany plus the
+    matching rollup deltas; the caller commits.
+    """
+    conn.executemany(_INSERT_TRANSACTION_SQL, params)
+    by_user: dict = {}
+    for p in params:
+        by_user.setdefault(p[0], []).append((p[1], p[3], p[4]))
+    for user_id, deltas in by_user.items():
+        _apply_rollup_delta(conn, user_id, deltas)
+        _bump_data_version(conn, user_id)
+
+
 def add_transaction(
     user_id: int,
     date: str,
@@ -129,25 +703,325 @@ def add_transaction(
     category: str,
     merchant: str,
     notes: str,
+    durable: bool = True,
 ):
+    """
+    Insert one transaction.
+
+    With the write-behind queue enabled (see enable_write_queue) the row is
+    committed by the background writer in a batch with other sessions'
+    inserts. durable=True (default) waits for that commit; durable=False
+    returns the PendingWrite right away. Writes made inside use_connection()
+    or an open get_conn() block are always applied directly.
+    """
     created_at = datetime.now().isoformat(timespec="seconds")
+    amount_cents = to_cents(amount)
+    params = (
+        user_id,
+        date,
+        amount_cents / 100,
+        amount_cents,
+        category,
+        merchant.strip() or None,
+        notes.strip() or None,
+        created_at,
+    )
+
+    write_queue = _write_queue
+    if write_queue is not None and getattr(_local, "override", None) is None and getattr(_local, "conn", None) is None:
+        pending = write_queue.submit(params)
+        if not durable:
+            return pending
+        if not pending.wait(WRITE_DURABLE_TIMEOUT_S):
+            raise TimeoutError(f"Queued write not committed within {WRITE_DURABLE_TIMEOUT_S}s")
+        return None
+
     with get_conn() as conn:
-        conn.execute(
+        _insert_transactions(conn, [params])
+        conn.commit()
+    return None
+
+
+def add_transactions_bulk(user_id: int, rows) -> int:
+    """
+    rows: iterable of (date, amount_cents, category, merchant, notes) tuples.
+    Inserts everything with one executemany in a single transaction.
+    Returns the number of rows inserted.
+    """
+    created_at = datetime.now().isoformat(timespec="seconds")
+    params = [
+        (user_id, d, int(cents) / 100, int(cents), category, merchant or None, notes or None, created_at)
+        for d, cents, category, merchant, notes in rows
+    ]
+    if not params:
+        return 0
+
+    with get_conn() as conn:
+        _insert_transactions(conn, params)
+        conn.commit()
+    return len(params)
+
+
+def insert_transaction_rows(params: list[tuple]) -> int:
+    """
+    Insert fully specified rows, for any number of users, in one transaction
+    (snapshot restores). params: (user_id, date, amount, amount_cents,
+    category, merchant, notes, created_at) tuples.
+    """
+    if not params:
+        return 0
+    with get_conn() as conn:
+        _insert_transactions(conn, params)
+        conn.commit()
+    return len(params)
+
+
+# Write-behind queue
+# Off unless FINANCE_TRACKER_WRITE_BEHIND=1 (or enable_write_queue()). One
+# background thread drains queued add_transaction rows and commits up to
+# WRITE_BATCH_MAX_ROWS of them per transaction (group commit): rows that
+# arrive while a batch is being written go into the next one, so a row waits
+# at most about one batch write. WRITE_BATCH_MAX_DELAY_S > 0 additionally
+# lingers that long after the first row to build bigger batches.
+WRITE_BATCH_MAX_ROWS = 500
+WRITE_BATCH_MAX_DELAY_S = 0.0
+WRITE_BUSY_RETRIES = 5
+WRITE_BUSY_BACKOFF_S = 0.05
+# Longest a durable add_transaction waits for the writer before giving up
+WRITE_DURABLE_TIMEOUT_S = 30.0
+
+
+class PendingWrite:
+    """A queued insert; wait() blocks until it is committed (or raises its error)."""
+
+    __slots__ = ("params", "error", "_done")
+
+    def __init__(self, params: tuple):
+        self.params = params
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once committed, False on timeout; re-raises a failed write's error."""
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class WriteQueue:
+    """
+    Single background writer that groups inserts from every session into
+    one transaction (one commit/fsync per batch instead of per row).
+    """
+
+    def __init__(
+        self,
+        max_rows: int = WRITE_BATCH_MAX_ROWS,
+        max_delay_s: float = WRITE_BATCH_MAX_DELAY_S,
+    ):
+        self.max_rows = max_rows
+        self.max_delay_s = max_delay_s
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._busy_retries = 0
+        self._failed = 0
+
+    def submit(self, params: tuple) -> PendingWrite:
+        self._ensure_thread()
+        pending = PendingWrite(params)
+        self._queue.put(pending)
+        return pending
+
+    def flush(self):
+        """Block until everything submitted so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="finance-write-queue", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list:
+        # Everything that queued up while the last batch was being written
+        # goes into the next one; max_delay_s optionally lingers for more.
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay_s
+        while len(batch) < self.max_rows and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pending = [p for p in batch if p is not None]
+            try:
+                if pending:
+                    self._write(pending)
+            except Exception as e:
+                # Anything unexpected (pool timeout, bad value...) fails this
+                # batch's writes but must never kill the writer thread.
+                self._fail(pending, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(pending) < len(batch):
+                return
+
+    def _write(self, pending: list[PendingWrite]):
+        for attempt in range(WRITE_BUSY_RETRIES + 1):
+            try:
+                with get_conn() as conn:
+                    _insert_transactions(conn, [p.params for p in pending])
+                    conn.commit()
+                break
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == WRITE_BUSY_RETRIES:
+                    self._write_each(pending)
+                    return
+                with self._lock:
+                    self._busy_retries += 1
+                time.sleep(WRITE_BUSY_BACKOFF_S * (2 ** attempt))
+            except (sqlite3.Error, ValueError, TypeError, OverflowError):
+                self._write_each(pending)
+                return
+
+        with self._lock:
+            self._batches += 1
+            self._rows += len(pending)
+            self._largest_batch = max(self._largest_batch, len(pending))
+        for p in pending:
+            p._finish()
+
+    def _write_each(self, pending: list[PendingWrite]):
+        # A batch failed: retry row by row so one bad row only fails itself
+        for p in pending:
+            try:
+                with get_conn() as conn:
+                    _insert_transactions(conn, [p.params])
+                    conn.commit()
+            except Exception as e:
+                self._fail([p], e)
+            else:
+                with self._lock:
+                    self._batches += 1
+                    self._rows += 1
+                    self._largest_batch = max(self._largest_batch, 1)
+                p._finish()
+
+    def _fail(self, pending: list[PendingWrite], error: BaseException):
+        unfinished = [p for p in pending if not p.done()]
+        with self._lock:
+            self._failed += len(unfinished)
+        for p in unfinished:
+            p._finish(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "rows": self._rows,
+                "largest_batch": self._largest_batch,
+                "avg_batch": (self._rows / self._batches) if self._batches else 0.0,
+                "busy_retries": self._busy_retries,
+                "failed": self._failed,
+            }
+
+
+_write_queue: Optional[WriteQueue] = None
+
+
+def enable_write_queue(enabled: bool = True, **options):
+    """Turn the write-behind queue on (options go to WriteQueue) or off (after flushing it)."""
+    global _write_queue
+    old, _write_queue = _write_queue, (WriteQueue(**options) if enabled else None)
+    if old is not None:
+        old.close()
+
+
+def flush_writes():
+    """Wait until every queued add_transaction has been committed."""
+    if _write_queue is not None:
+        _write_queue.flush()
+
+
+def write_queue_stats() -> Optional[dict]:
+    return _write_queue.stats() if _write_queue is not None else None
+
+
+if os.environ.get("FINANCE_TRACKER_WRITE_BEHIND", "").strip().lower() in {"1", "true", "yes", "on"}:
+    enable_write_queue()
+atexit.register(enable_write_queue, False)
+
+
+def count_transactions(user_id: int) -> int:
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return int(row[0])
+
+
+def max_transaction_id() -> int:
+    with get_conn() as conn:
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()
+    return int(row[0])
+
+
+def fetch_transaction_keys(user_id: int, start_date: str, end_date: str, max_id: int):
+    """
+    (date, amount_cents, merchant) for the user's rows with start_date <= date < end_date
+    and id <= max_id. Used to dedupe imports against rows that existed before
+    the import started.
+    """
+    with get_conn() as conn:
+        rows = conn.execute(
             """
-            INSERT INTO transactions (user_id, date, amount, category, merchant, notes, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            SELECT date, amount_cents, merchant FROM transactions
+            WHERE user_id = ? AND date >= ? AND date < ? AND id <= ?
             """,
-            (
-                user_id,
-                date,
-                amount,
-                category,
-                merchant.strip() or None,
-                notes.strip() or None,
-                created_at,
-            ),
-        )
-        conn.commit()
+            (user_id, start_date, end_date, max_id),
+        ).fetchall()
+    return rows
 
 
 def fetch_transactions(user_id: int):
@@ -163,8 +1037,688 @@ def fetch_transactions(user_id: int):
     return rows
 
 
+def fetch_transaction_months(user_id: int) -> list[str]:
+    """
+    Distinct months (YYYY-MM) with transactions for the user, newest first;
+    rows with malformed dates don't produce a month. Walks backwards one month at a time with MAX() seeks on the (user_id, date)
+    index, so the cost scales with the number of months rather than rows.
+    """
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            WITH RECURSIVE months(month_key) AS (
+                SELECT substr(MAX(date), 1, 7)
+                FROM transactions
+                WHERE user_id = :user_id
+                UNION ALL
+                SELECT (
+                    SELECT substr(MAX(date), 1, 7)
+                    FROM transactions
+                    WHERE user_id = :user_id AND date < months.month_key || '-01'
+                )
+                FROM months
+                WHERE months.month_key IS NOT NULL
+            )
+            SELECT month_key FROM months WHERE month_key IS NOT NULL
+            """,
+            {"user_id": user_id},
+        ).fetchall()
+    return [r["month_key"] for r in rows if is_month_key(r["month_key"])]
+
+
+TRANSACTION_COLUMNS = ("id", "user_id", "date", "amount_cents", "category", "merchant", "notes", "created_at")
+
+
+def _like_contains(text: str) -> str:
+    """Lower-cased substring LIKE pattern for text; use with ESCAPE '\\'."""
+    escaped = text.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _transaction_filters(
+    user_id: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    category: Optional[str] = None,
+    text: Optional[str] = None,
+) -> tuple[str, list]:
+    """WHERE clause (and params) shared by the columnar, page and count queries."""
+    where = "user_id = ?"
+    params: list = [user_id]
+    if start_date is not None:
+        where += " AND date >= ?"
+        params.append(start_date)
+    if end_date is not None:
+        where += " AND date < ?"
+        params.append(end_date)
+    if category:
+        where += " AND category = ?"
+        params.append(category)
+    if text and text.strip():
+        # Case-insensitive substring match on merchant/notes
+        like = _like_contains(text)
+        where += " AND (LOWER(merchant) LIKE ? ESCAPE '\\' OR LOWER(notes) LIKE ? ESCAPE '\\')"
+        params.extend([like, like])
+    return where, params
+
+
+def _fetch_tuples(sql: str, params) -> list[tuple]:
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None   # plain tuples are cheaper than sqlite3.Row
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def fetch_transaction_columns(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    text: Optional[str] = None,
+) -> tuple[tuple[str, ...], list[tuple]]:
+    """
+    Plain-tuple rows (no sqlite3.Row objects) for columnar loading, newest
+    first; optionally limited to start_date <= date < end_date, one category
+    and/or a merchant/notes substring.
+
+    Returns (column names, rows).
+    """
+    where, params = _transaction_filters(user_id, start_date, end_date, category, text)
+    rows = _fetch_tuples(
+        f"""
+        SELECT {", ".join(TRANSACTION_COLUMNS)} FROM transactions
+        WHERE {where}
+        ORDER BY date DESC, id DESC
+        """,
+        params,
+    )
+    return TRANSACTION_COLUMNS, rows
+
+
+def fetch_transactions_page(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    text: Optional[str] = None,
+    after: Optional[tuple[str, int]] = None,
+    limit: int = 50,
+    newest_first: bool = True,
+) -> tuple[tuple[str, ...], list[tuple]]:
+    """
+    One page of transactions ordered by (date, id), using keyset pagination:
+    after is the (date, id) of the last row of the previous page, so every
+    page is an index range scan no matter how deep it is (no OFFSET).
+
+    Filters are the same as fetch_transaction_columns. Returns
+    (column names, rows); ask for limit + 1 rows to learn whether another
+    page follows.
+    """
+    where, params = _transaction_filters(user_id, start_date, end_date, category, text)
+    direction = "DESC" if newest_first else "ASC"
+    if after is not None:
+        where += f" AND (date, id) {'<' if newest_first else '>'} (?, ?)"
+        params.extend([after[0], int(after[1])])
+    params.append(int(limit))
+
+    rows = _fetch_tuples(
+        f"""
+        SELECT {", ".join(TRANSACTION_COLUMNS)} FROM transactions
+        WHERE {where}
+        ORDER BY date {direction}, id {direction}
+        LIMIT ?
+        """,
+        params,
+    )
+    return TRANSACTION_COLUMNS, rows
+
+
+def count_transactions_filtered(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    text: Optional[str] = None,
+) -> int:
+    where, params = _transaction_filters(user_id, start_date, end_date, category, text)
+    with get_conn() as conn:
+        row = conn.execute(f"SELECT COUNT(*) FROM transactions WHERE {where}", params).fetchone()
+    return int(row[0])
+
+
+def iter_transactions_between(
+    user_id: Optional[int],
+    start_date: str,
+    end_date: str,
+    columns: tuple[str, ...] = ("user_id", "date", "amount_cents", "category", "merchant", "notes"),
+    batch_size: int = 5000,
+):
+    """
+    Stream transactions with start_date <= date < end_date, oldest first, as
+    lists of plain tuples (one list per batch). user_id=None streams every
+    account (ordered by user, then date).
+
+    The pooled connection is held until the generator is exhausted or closed.
+    """
+    cols = ", ".join(columns)
+    if user_id is None:
+        sql = f"""
+            SELECT {cols} FROM transactions
+            WHERE user_id IS NOT NULL AND date >= ? AND date < ?
+            ORDER BY user_id, date, id
+        """
+        params = (start_date, end_date)
+    else:
+        sql = f"""
+            SELECT {cols} FROM transactions
+            WHERE user_id = ? AND date >= ? AND date < ?
+            ORDER BY date, id
+        """
+        params = (user_id, start_date, end_date)
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None   # plain tuples are cheaper than sqlite3.Row
+        cur.execute(sql, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+
+def fetch_month_daily_totals(user_id: int, month_key: str):
+    """
+    month_key: "YYYY-MM"
+    Same shape as fetch_month_rollups, aggregated directly from transactions.
+    """
+    start_date, end_date = month_bounds(month_key)
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT category, date AS day, SUM(amount_cents) AS amount_cents, COUNT(*) AS tx_count
+            FROM transactions
+            WHERE user_id = ? AND date >= ? AND date < ?
+            GROUP BY category, date
+            """,
+            (user_id, start_date, end_date),
+        ).fetchall()
+    return rows
+
+
 def clear_user_data(user_id: int):
     with get_conn() as conn:
         conn.execute("DELETE FROM transactions WHERE user_id = ?;", (user_id,))
         conn.execute("DELETE FROM budgets WHERE user_id = ?;", (user_id,))
+        conn.execute("DELETE FROM monthly_rollups WHERE user_id = ?;", (user_id,))
+        conn.execute("DELETE FROM recurring_charges WHERE user_id = ?;", (user_id,))
+        _bump_data_version(conn, user_id)
+        conn.commit()
+
+
+# Monthly rollups
+def _apply_rollup_delta(conn: sqlite3.Connection, user_id: int, rows):
+    """
+    rows: iterable of (date, amount_cents, category). Adds them to
+    monthly_rollups, pre-aggregated per day/category so a bulk write touches
+    each rollup row once.
+    """
+    if user_id is None:
+        return
+
+    deltas = {}
+    for d, cents, category in rows:
+        key = (d, category)
+        total, count = deltas.get(key, (0, 0))
+        deltas[key] = (total + int(cents), count + 1)
+    if not deltas:
+        return
+
+    conn.executemany(
+        """
+        INSERT INTO monthly_rollups (user_id, month, category, day, amount_cents, tx_count)
+        VALUES (?, substr(?, 1, 7), ?, ?, ?, ?)
+        ON CONFLICT(user_id, month, category, day) DO UPDATE SET
+            amount_cents = amount_cents + excluded.amount_cents,
+            tx_count = tx_count + excluded.tx_count
+        """,
+        [
+            (user_id, d, category, d, total, count)
+            for (d, category), (total, count) in deltas.items()
+        ],
+    )
+
+
+def _rebuild_monthly_rollups(conn: sqlite3.Connection, user_id: Optional[int] = None):
+    where = "WHERE user_id IS NOT NULL" if user_id is None else "WHERE user_id = :user_id"
+    conn.execute(f"DELETE FROM monthly_rollups {where};", {"user_id": user_id})
+    conn.execute(
+        f"""
+        INSERT INTO monthly_rollups (user_id, month, category, day, amount_cents, tx_count)
+        SELECT user_id, substr(date, 1, 7), category, date, SUM(amount_cents), COUNT(*)
+        FROM transactions
+        {where}
+        GROUP BY user_id, date, category
+        """,
+        {"user_id": user_id},
+    )
+
+
+def rebuild_monthly_rollups(user_id: Optional[int] = None):
+    """Recompute monthly_rollups from transactions (all users if user_id is None)."""
+    with get_conn() as conn:
+        _rebuild_monthly_rollups(conn, user_id)
+        # Cached summaries were built from the old rollups
+        if user_id is None:
+            user_ids = [r[0] for r in conn.execute("SELECT id FROM users").fetchall()]
+        else:
+            user_ids = [user_id]
+        for uid in user_ids:
+            _bump_data_version(conn, uid)
         conn.commit()
+
+
+def fetch_month_rollups(user_id: int, month_key: str):
+    """
+    month_key: "YYYY-MM"
+    Returns (category, day, amount_cents, tx_count) rows for the month.
+    """
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT category, day, amount_cents, tx_count FROM monthly_rollups
+            WHERE user_id = ? AND month = ?
+            """,
+            (user_id, month_key),
+        ).fetchall()
+    return rows
+
+
+def fetch_monthly_category_totals(user_id: int):
+    """
+    (month, category, amount_cents) for every month and category the user
+    has, oldest first. One GROUP BY over monthly_rollups, so the cost scales
+    with days x categories rather than transactions.
+    """
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT month, category, SUM(amount_cents) AS amount_cents FROM monthly_rollups
+            WHERE user_id = ?
+            GROUP BY month, category
+            ORDER BY month, category
+            """,
+            (user_id,),
+        ).fetchall()
+    return rows
+
+
+# Budgets
+# A budget row applies to one (user, month, category). With recurring = 1 it
+# also applies to every later month, until a later recurring row for the
+# same category takes over; a one-off row for a month always wins.
+def set_budget(user_id: int, category: str, month_key: str, budget_cents: int, recurring: bool = False):
+    created_at = datetime.now().isoformat(timespec="seconds")
+    with get_conn() as conn:
+        conn.execute(
+            """
+            INSERT INTO budgets (user_id, month, category, budget_amount, budget_cents, recurring, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, month, category) DO UPDATE SET
+                budget_amount = excluded.budget_amount,
+                budget_cents = excluded.budget_cents,
+                recurring = excluded.recurring
+            """,
+            (user_id, month_key, category, int(budget_cents) / 100, int(budget_cents), int(bool(recurring)), created_at),
+        )
+        _bump_data_version(conn, user_id)
+        conn.commit()
+
+
+def delete_budget(user_id: int, month_key: str, category: str) -> bool:
+    with get_conn() as conn:
+        cur = conn.execute(
+            "DELETE FROM budgets WHERE user_id = ? AND month = ? AND category = ?",
+            (user_id, month_key, category),
+        )
+        if cur.rowcount:
+            _bump_data_version(conn, user_id)
+        conn.commit()
+    return cur.rowcount > 0
+
+
+def fetch_budgets(user_id: int):
+    """(month, category, budget_cents, recurring) rows, newest month first."""
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT month, category, budget_cents, recurring FROM budgets
+            WHERE user_id = ?
+            ORDER BY month DESC, category
+            """,
+            (user_id,),
+        ).fetchall()
+    return rows
+
+
+def fetch_budget_vs_actual(
+    user_id: int,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+):
+    """
+    Effective budget and actual spend for every budgeted (month, category)
+    in [start_month, end_month] (YYYY-MM, inclusive; None = unbounded), in a
+    single query joining budgets to the monthly_rollups aggregates.
+
+    Months considered are those with transactions or a one-off budget.
+    Returns (month, category, budget_cents, actual_cents) rows ordered by
+    month, category.
+    """
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            WITH months(month) AS (
+                SELECT DISTINCT month FROM monthly_rollups
+                WHERE user_id = :user_id
+                  AND (:start IS NULL OR month >= :start)
+                  AND (:end IS NULL OR month <= :end)
+                UNION
+                SELECT month FROM budgets
+                WHERE user_id = :user_id AND recurring = 0
+                  AND (:start IS NULL OR month >= :start)
+                  AND (:end IS NULL OR month <= :end)
+            ),
+            categories(category) AS (
+                SELECT DISTINCT category FROM budgets WHERE user_id = :user_id
+            ),
+            effective AS (
+                SELECT m.month, c.category,
+                       COALESCE(
+                           (SELECT b.budget_cents FROM budgets b
+                            WHERE b.user_id = :user_id AND b.category = c.category
+                              AND b.month = m.month AND b.recurring = 0),
+                           (SELECT b.budget_cents FROM budgets b
+                            WHERE b.user_id = :user_id AND b.category = c.category
+                              AND b.month <= m.month AND b.recurring = 1
+                            ORDER BY b.month DESC LIMIT 1)
+                       ) AS budget_cents
+                FROM months m CROSS JOIN categories c
+            ),
+            actual AS (
+                SELECT month, category, SUM(amount_cents) AS actual_cents
+                FROM monthly_rollups
+                WHERE user_id = :user_id
+                  AND (:start IS NULL OR month >= :start)
+                  AND (:end IS NULL OR month <= :end)
+                GROUP BY month, category
+            )
+            SELECT e.month, e.category, e.budget_cents, COALESCE(a.actual_cents, 0) AS actual_cents
+            FROM effective e
+            LEFT JOIN actual a ON a.month = e.month AND a.category = e.category
+            WHERE e.budget_cents IS NOT NULL
+            ORDER BY e.month, e.category
+            """,
+            {"user_id": user_id, "start": start_month, "end": end_month},
+        ).fetchall()
+    return rows
+
+
+# Full-text search (merchant / notes)
+_fts_available: Optional[bool] = None
+
+
+_SEARCH_TRIGGERS = {
+    "transactions_fts_ai": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, owner, merchant, notes)
+            VALUES (new.id, 'u' || new.user_id, new.merchant, new.notes);
+        END;
+    """,
+    "transactions_fts_ad": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, owner, merchant, notes)
+            VALUES ('delete', old.id, 'u' || old.user_id, old.merchant, old.notes);
+        END;
+    """,
+    "transactions_fts_au": """
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_au
+        AFTER UPDATE OF user_id, merchant, notes ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, owner, merchant, notes)
+            VALUES ('delete', old.id, 'u' || old.user_id, old.merchant, old.notes);
+            INSERT INTO transactions_fts (rowid, owner, merchant, notes)
+            VALUES (new.id, 'u' || new.user_id, new.merchant, new.notes);
+        END;
+    """,
+}
+
+
+def _missing_search_triggers(conn: sqlite3.Connection) -> list[str]:
+    existing = {
+        r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    }
+    return [name for name in _SEARCH_TRIGGERS if name not in existing]
+
+
+def _ensure_search_triggers(conn: sqlite3.Connection):
+    for name in _missing_search_triggers(conn):
+        conn.execute(_SEARCH_TRIGGERS[name])
+
+
+def _init_search_index(conn: sqlite3.Connection):
+    """
+    FTS5 index over transactions.merchant/notes (external content kept in
+    sync by triggers). Each row also indexes an owner token ('u' || user_id)
+    so searches match and rank only the user's own rows. Skipped when this
+    SQLite build lacks FTS5; search then falls back to LIKE.
+    """
+    global _fts_available
+    existed = _table_exists(conn, "transactions_fts")
+    conn.execute(
+        """
+        CREATE VIEW IF NOT EXISTS transactions_fts_source AS
+        SELECT id, 'u' || user_id AS owner, merchant, notes FROM transactions;
+        """
+    )
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                owner,
+                merchant,
+                notes,
+                content = 'transactions_fts_source',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            """
+        )
+    except sqlite3.OperationalError:
+        _fts_available = False
+        return
+
+    _ensure_search_triggers(conn)
+    if not existed:
+        conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');")
+    _fts_available = True
+
+
+def _repair_search_index(conn: sqlite3.Connection):
+    """
+    Recreate missing FTS sync triggers (e.g. dropped by an older build or a
+    hand edit) and rebuild the index they should have kept in sync. One
+    sqlite_master read when nothing is missing.
+    """
+    if not _table_exists(conn, "transactions_fts") or not _missing_search_triggers(conn):
+        return
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        if _missing_search_triggers(conn):
+            _ensure_search_triggers(conn)
+            conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');")
+        conn.commit()
+    except sqlite3.OperationalError:
+        # FTS5 missing from this SQLite build; search falls back to LIKE
+        conn.rollback()
+
+
+def fts_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        with get_conn() as conn:
+            _fts_available = _table_exists(conn, "transactions_fts")
+    return _fts_available
+
+
+def rebuild_search_index():
+    with get_conn() as conn:
+        conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');")
+        conn.commit()
+
+
+def build_fts_query(text: str) -> str:
+    """
+    User search text -> FTS5 MATCH expression. "Quoted text" is a phrase,
+    every other word is a prefix term; all terms must match.
+    """
+    terms = []
+    for i, part in enumerate(text.split('"')):
+        if i % 2 == 1:
+            words = part.split()
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        else:
+            for word in part.split():
+                word = word.replace('"', "")
+                if word:
+                    terms.append('"' + word + '"*')
+    return " AND ".join(terms)
+
+
+def search_transactions(
+    user_id: int,
+    text: str,
+    category: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+):
+    """
+    Search merchant/notes across all of the user's months, best matches first.
+    Returns up to limit rows starting at offset.
+    """
+    category_sql = "AND t.category = :category" if category else ""
+    params = {"user_id": user_id, "category": category, "limit": limit, "offset": offset}
+
+    if fts_available():
+        match = build_fts_query(text)
+        if not match:
+            return []
+        # The owner term keeps matching and ranking to this user's rows
+        params["match"] = f'owner:"u{int(user_id)}" AND {{merchant notes}} : ({match})'
+        sql = f"""
+            SELECT t.*, bm25(transactions_fts, 0.0, 1.0, 1.0) AS rank
+            FROM transactions_fts
+            JOIN transactions t ON t.id = transactions_fts.rowid
+            WHERE transactions_fts MATCH :match
+              AND t.user_id = :user_id {category_sql}
+            ORDER BY rank, t.date DESC, t.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        params["like"] = _like_contains(text)
+        sql = f"""
+            SELECT t.*, 0.0 AS rank
+            FROM transactions t
+            WHERE t.user_id = :user_id {category_sql}
+              AND (LOWER(t.merchant) LIKE :like ESCAPE '\\' OR LOWER(t.notes) LIKE :like ESCAPE '\\')
+            ORDER BY t.date DESC, t.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    with get_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return rows
+
+
+# Recurring charges
+RECURRING_COLUMNS = (
+    "merchant", "category", "period", "amount_cents", "occurrences", "first_date", "last_date", "next_date",
+)
+
+
+def _recurring_version_key(user_id: int) -> str:
+    return f"recurring_version:{user_id}"
+
+
+def iter_recurring_candidates(user_id: Optional[int] = None, batch_size: int = 5000):
+    """
+    Stream (user_id, date, amount_cents, category, merchant) tuples for
+    expense rows that have a merchant, in batches; user_id=None streams every
+    account, ordered by user so callers can split at user boundaries.
+    """
+    user_sql = "user_id IS NOT NULL" if user_id is None else "user_id = :user_id"
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(
+            f"""
+            SELECT user_id, date, amount_cents, category, merchant FROM transactions
+            WHERE {user_sql} AND category != 'Income' AND merchant IS NOT NULL AND amount_cents > 0
+            ORDER BY user_id
+            """,
+            {"user_id": user_id},
+        )
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+
+def save_recurring_charges(results: dict):
+    """
+    results: {user_id: (data_version, rows)} with rows as RECURRING_COLUMNS
+    tuples. Replaces each listed user's stored charges and records the data
+    version they were detected from, all in one transaction.
+    """
+    with get_conn() as conn:
+        for user_id, (data_version, rows) in results.items():
+            conn.execute("DELETE FROM recurring_charges WHERE user_id = ?;", (user_id,))
+            conn.executemany(
+                f"""
+                INSERT INTO recurring_charges (user_id, {", ".join(RECURRING_COLUMNS)})
+                VALUES (?, {", ".join("?" * len(RECURRING_COLUMNS))})
+                """,
+                [(user_id, *row) for row in rows],
+            )
+            conn.execute(
+                """
+                INSERT INTO app_meta (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                (_recurring_version_key(user_id), int(data_version)),
+            )
+        conn.commit()
+
+
+def fetch_recurring_charges(user_id: int):
+    """
+    (stored rows, data version they were detected from), or (None, None) if
+    detection never ran for this user.
+    """
+    with get_conn() as conn:
+        version = conn.execute(
+            "SELECT value FROM app_meta WHERE key = ?", (_recurring_version_key(user_id),)
+        ).fetchone()
+        if version is None:
+            return None, None
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(RECURRING_COLUMNS)} FROM recurring_charges
+            WHERE user_id = ?
+            ORDER BY next_date, merchant
+            """,
+            (user_id,),
+        ).fetchall()
+    return rows, int(version[0])
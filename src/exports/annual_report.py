@@ -0,0 +1,165 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from reportlab.lib.units import inch
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, Spacer
+
+import src.db as db
+from src.analytics import monthly_summary_sql
+from src.exports.pdf_cache import content_key, get_or_build_pdf
+from src.exports.pdf_report import make_table, new_report_doc, month_section_rows, month_section_story
+from src.utils.money import fmt_money
+from src.utils.dates import month_label
+
+
+def _year_months(year: int) -> list[str]:
+    return [f"{year:04d}-{m:02d}" for m in range(1, 13)]
+
+
+def _spawn_pool(max_workers: Optional[int]) -> ProcessPoolExecutor:
+    # spawn (not fork): workers must not inherit the parent's pooled SQLite
+    # connections. They reopen the same DB file on first use.
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(str(db.DB_PATH),),
+    )
+
+
+def _init_worker(db_path: str):
+    db.DB_PATH = Path(db_path)
+
+
+def _month_section(user_id: int, month_key: str) -> dict:
+    """Summary + table rows for one month."""
+    by_cat, by_day, total_income, total_expenses, net, _remaining = monthly_summary_sql(
+        user_id, month_key
+    )
+    return {
+        "month_key": month_key,
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net": net,
+        "by_cat": list(zip(by_cat["category"].tolist(), by_cat["amount"].tolist())),
+        "rows": month_section_rows(total_income, total_expenses, by_cat, by_day),
+    }
+
+
+def compute_annual_sections(user_id: int, year: int) -> list[dict]:
+    """Month sections for Jan..Dec (each a rollup-table read)."""
+    return [_month_section(user_id, m) for m in _year_months(year)]
+
+
+def _annual_summary_story(year: int, sections: list[dict], styles) -> list:
+    total_income = sum(s["total_income"] for s in sections)
+    total_expenses = sum(s["total_expenses"] for s in sections)
+    net = total_income - total_expenses
+
+    month_rows = [["Month", "Income ($)", "Expenses ($)", "Net ($)"]]
+    for s in sections:
+        month_rows.append(
+            [
+                month_label(s["month_key"]),
+                f"{s['total_income']:.2f}",
+                f"{s['total_expenses']:.2f}",
+                f"{s['net']:.2f}",
+            ]
+        )
+
+    by_cat = {}
+    for s in sections:
+        for category, amount in s["by_cat"]:
+            by_cat[category] = by_cat.get(category, 0.0) + float(amount)
+    cat_rows = [["Category", "Amount ($)"]]
+    for category, amount in sorted(by_cat.items(), key=lambda kv: kv[1], reverse=True):
+        cat_rows.append([category, f"{amount:.2f}"])
+    if len(cat_rows) == 1:
+        cat_rows.append(["(no data)", ""])
+
+    story = []
+    story.append(Paragraph(f"Annual Report - {year}", styles["Title"]))
+    story.append(Spacer(1, 0.2 * inch))
+    story.append(Paragraph(f"Income: {fmt_money(total_income)}", styles["Normal"]))
+    story.append(Paragraph(f"Expenses: {fmt_money(total_expenses)}", styles["Normal"]))
+    story.append(Paragraph(f"Net: {fmt_money(net)}", styles["Normal"]))
+    story.append(Spacer(1, 0.25 * inch))
+
+    story.append(Paragraph("Month by Month", styles["Heading2"]))
+    story.append(make_table(month_rows))
+    story.append(Spacer(1, 0.25 * inch))
+
+    story.append(Paragraph("Spending by Category (Expenses Only)", styles["Heading2"]))
+    story.append(make_table(cat_rows))
+    return story
+
+
+def build_annual_pdf_from_sections(year: int, sections: list[dict]) -> bytes:
+    """Merge the annual summary and every month's section into one PDF."""
+    pdf_buffer = io.BytesIO()
+    doc = new_report_doc(pdf_buffer)
+    styles = getSampleStyleSheet()
+
+    story = _annual_summary_story(year, sections, styles)
+    for s in sections:
+        story.append(PageBreak())
+        story.extend(
+            month_section_story(
+                month_label(s["month_key"]),
+                s["total_income"],
+                s["total_expenses"],
+                s["net"],
+                s["rows"],
+                styles,
+                title_style="Heading1",
+            )
+        )
+
+    doc.build(story)
+    pdf_buffer.seek(0)
+    return pdf_buffer.getvalue()
+
+
+def build_annual_report_pdf_bytes(user_id: int, year: int) -> bytes:
+    """
+    Year-end report: annual summary followed by one section per month.
+    The rendered PDF is cached by a hash of the sections
+    (src.exports.pdf_cache).
+    """
+    sections = compute_annual_sections(user_id, year)
+
+    key = content_key({"annual": year, "sections": sections})
+    return get_or_build_pdf(key, lambda: build_annual_pdf_from_sections(year, sections))
+
+
+def _write_user_report(user_id: int, username: str, year: int, out_dir: str) -> str:
+    path = Path(out_dir) / f"Annual_Report_{username}_{year}.pdf"
+    path.write_bytes(build_annual_pdf_from_sections(year, compute_annual_sections(user_id, year)))
+    return str(path)
+
+
+def generate_annual_reports(year: int, out_dir, max_workers: Optional[int] = None) -> list[str]:
+    """
+    Batch entry point: write an annual report PDF for every user into out_dir.
+    Each user's report (summaries + layout) is built in its own worker process.
+    Returns the written file paths.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    users = [(int(u["id"]), u["username"]) for u in db.fetch_users()]
+    if not users:
+        return []
+
+    workers = max_workers or os.cpu_count() or 1
+    with _spawn_pool(workers) as executor:
+        futures = [
+            executor.submit(_write_user_report, user_id, username, year, str(out_dir))
+            for user_id, username in users
+        ]
+        return [f.result() for f in futures]
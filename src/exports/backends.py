@@ -0,0 +1,22 @@
+import importlib
+from typing import Callable
+
+# Export backends by name -> (module, function). Modules are imported the
+# first time a backend is used, so heavy libraries (ReportLab, Parquet) stay
+# out of app startup and are only paid for by the first download.
+_BACKENDS: dict[str, tuple[str, str]] = {
+    "dashboard_pdf": ("src.exports.pdf_report", "build_dashboard_pdf_bytes"),
+    "annual_pdf": ("src.exports.annual_report", "build_annual_report_pdf_bytes"),
+    "parquet_snapshot": ("src.exports.snapshot", "stream_snapshot"),
+    "parquet_import": ("src.imports.snapshot_import", "import_snapshot"),
+}
+_loaded: dict[str, Callable] = {}
+
+
+def get_backend(name: str) -> Callable:
+    fn = _loaded.get(name)
+    if fn is None:
+        module, function = _BACKENDS[name]
+        fn = getattr(importlib.import_module(module), function)
+        _loaded[name] = fn
+    return fn
@@ -1,37 +1,109 @@
+import io
+import tempfile
+from typing import Optional
+
 import pandas as pd
-from src.utils.money import fmt_money
+
+from src.db import iter_transactions_between
+from src.utils.dates import display_dates, iso_to_display
+from src.utils.money import fmt_cents_series, fmt_money_series
+
+EXPORT_COLUMNS = {
+    "date": "Date",
+    "amount": "Amount ($)",
+    "category": "Category",
+    "merchant": "Merchant",
+    "notes": "Notes",
+}
+
+# Rows per formatted chunk, and how much of the output stays in RAM before
+# the spooled file rolls over to disk.
+STREAM_CHUNK_ROWS = 5000
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _format_export_chunk(df: pd.DataFrame, iso_dates: bool = False) -> pd.DataFrame:
+    if iso_dates:
+        # Straight from SQLite (YYYY-MM-DD): reorder by slicing, no date parsing
+        df["date"] = iso_to_display(df["date"])
+    else:
+        df["date"] = display_dates(pd.to_datetime(df["date"], errors="coerce"))
+    if "amount_cents" in df.columns:
+        df["amount"] = fmt_cents_series(df.pop("amount_cents"))
+    else:
+        df["amount"] = fmt_money_series(df["amount"])
+    df["merchant"] = df["merchant"].fillna("")
+    df["notes"] = df["notes"].fillna("")
+
+    ordered = [c for c in ["user_id", *EXPORT_COLUMNS] if c in df.columns]
+    return df[ordered].rename(columns=EXPORT_COLUMNS)
 
 
 def build_transactions_export_csv(df_view: pd.DataFrame, selected_label: str) -> tuple[bytes, str]:
     """
     Returns: (csv_bytes, filename)
     """
-    export_df = (
-        df_view.sort_values(["date", "id"], ascending=[True, True])[
-            ["date", "amount", "category", "merchant", "notes"]
-        ]
-        .copy()
+    columns = list(EXPORT_COLUMNS)
+    if "amount_cents" in df_view.columns:
+        columns.append("amount_cents")
+    export_df = _format_export_chunk(
+        df_view.sort_values(["date", "id"], ascending=[True, True])[columns].copy()
     )
 
-    export_df["date"] = pd.to_datetime(export_df["date"], errors="coerce").dt.strftime("%m/%d/%Y")
-    export_df["amount"] = (
-        pd.to_numeric(export_df["amount"], errors="coerce")
-        .fillna(0)
-        .apply(fmt_money)
-    )
-    export_df["merchant"] = export_df["merchant"].fillna("")
-    export_df["notes"] = export_df["notes"].fillna("")
-
-    export_df = export_df.rename(
-        columns={
-            "date": "Date",
-            "amount": "Amount ($)",
-            "category": "Category",
-            "merchant": "Merchant",
-            "notes": "Notes",
-        }
-    )
+    buf = io.BytesIO()
+    export_df.to_csv(buf, index=False, encoding="utf-8")
 
     safe_month = selected_label.replace("/", "-")
     filename = f"Transactions_{safe_month}.csv"
-    return export_df.to_csv(index=False).encode("utf-8"), filename
+    return buf.getvalue(), filename
+
+
+def stream_transactions_export_csv(
+    user_id: Optional[int],
+    start_date: str,
+    end_date: str,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+):
+    """
+    Export transactions with start_date <= date < end_date straight from
+    SQLite, oldest first. Rows are read with a cursor and formatted/written
+    chunk_rows at a time, so memory stays flat for any range size.
+
+    user_id=None exports every account (adds a "User ID" column).
+
+    Returns: (file, row_count) where file is a binary SpooledTemporaryFile
+    positioned at the start. The caller owns (and should close) it.
+    """
+    all_accounts = user_id is None
+    columns = (["user_id"] if all_accounts else []) + [
+        "amount_cents" if c == "amount" else c for c in EXPORT_COLUMNS
+    ]
+
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b")
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+
+    row_count = 0
+    header = True
+    for batch in iter_transactions_between(
+        user_id, start_date, end_date, columns=tuple(columns), batch_size=chunk_rows
+    ):
+        chunk = _format_export_chunk(pd.DataFrame.from_records(batch, columns=columns), iso_dates=True)
+        if all_accounts:
+            chunk = chunk.rename(columns={"user_id": "User ID"})
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+        row_count += len(batch)
+
+    if header:
+        empty_cols = (["User ID"] if all_accounts else []) + list(EXPORT_COLUMNS.values())
+        pd.DataFrame(columns=empty_cols).to_csv(text, index=False)
+
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return out, row_count
+
+
+def export_range_filename(start_date: str, end_date: str, all_accounts: bool = False) -> str:
+    prefix = "AllAccounts_Transactions" if all_accounts else "Transactions"
+    return f"{prefix}_{start_date}_to_{end_date}.csv"
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+from src.exports.backends import get_backend
+
+# Total bytes of PDFs kept in memory (per process) before LRU eviction
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class PdfCache:
+    """
+    Content-addressed LRU of rendered PDFs, bounded by total size in bytes.
+    Keys are hashes of the report inputs, so identical summaries (any user,
+    any session) share one rendered document.
+    """
+
+    def __init__(self, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self._misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_pdf_cache = PdfCache()
+
+
+def dashboard_pdf_key(
+    selected_label: str,
+    total_income: float,
+    total_expenses: float,
+    net: float,
+    by_cat: pd.DataFrame,
+    by_day: pd.DataFrame,
+) -> str:
+    """sha256 over everything build_dashboard_pdf_bytes renders."""
+    payload = {
+        "label": selected_label,
+        "totals": [round(float(x), 2) for x in (total_income, total_expenses, net)],
+        "by_cat": [
+            [str(c), round(float(a), 2)]
+            for c, a in zip(by_cat.get("category", []), by_cat.get("amount", []))
+        ],
+        "by_day": [
+            [str(d), round(float(a), 2)]
+            for d, a in zip(by_day.get("day", []), by_day.get("amount", []))
+        ],
+    }
+    return content_key(payload)
+
+
+def get_cached_dashboard_pdf(key: str) -> Optional[bytes]:
+    return _pdf_cache.get(key)
+
+
+def build_dashboard_pdf_cached(key: str, **report_inputs) -> bytes:
+    """
+    Return the cached PDF for key, building (and caching) it on a miss.
+    report_inputs are the keyword arguments of build_dashboard_pdf_bytes.
+    """
+    return get_or_build_pdf(key, lambda: get_backend("dashboard_pdf")(**report_inputs))
+
+
+def get_or_build_pdf(key: str, build) -> bytes:
+    """Generic content-addressed lookup; build() is called only on a miss."""
+    pdf_bytes = _pdf_cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = build()
+        _pdf_cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+def content_key(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def pdf_cache_stats() -> dict:
+    return _pdf_cache.stats()
@@ -8,19 +8,58 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 
 
-def build_dashboard_pdf_bytes(
-    selected_label: str,
+def _money(x: float) -> str:
+    return f"${float(x):,.2f}"
+
+
+def make_table(data):
+    t = Table(data, hAlign="LEFT")
+    t.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#111827")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 10),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#9CA3AF")),
+                ("FONTSIZE", (0, 1), (-1, -1), 9),
+                (
+                    "ROWBACKGROUNDS",
+                    (0, 1),
+                    (-1, -1),
+                    [colors.whitesmoke, colors.lightgrey],
+                ),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        )
+    )
+    return t
+
+
+def new_report_doc(pdf_buffer):
+    return SimpleDocTemplate(
+        pdf_buffer,
+        pagesize=letter,
+        leftMargin=0.7 * inch,
+        rightMargin=0.7 * inch,
+        topMargin=0.7 * inch,
+        bottomMargin=0.7 * inch,
+    )
+
+
+def month_section_rows(
     total_income: float,
     total_expenses: float,
-    net: float,
     by_cat: pd.DataFrame,
     by_day: pd.DataFrame,
-) -> bytes:
-    
-    # Download Monthly Dashboard PDF (report)
-    def _money(x: float) -> str:
-        return f"${float(x):,.2f}"
-
+) -> dict:
+    """
+    Plain table rows (lists of strings) for one month's report section.
+    Kept free of ReportLab objects so it can be built in worker processes.
+    """
     income_vs_expense_rows = [
         ["Type", "Amount ($)"],
         ["Income", f"{float(total_income):.2f}"],
@@ -46,45 +85,24 @@ def build_dashboard_pdf_bytes(
     else:
         by_day_rows.append(["(no data)", ""])
 
-    def _make_table(data):
-        t = Table(data, hAlign="LEFT")
-        t.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#111827")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#9CA3AF")),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                    (
-                        "ROWBACKGROUNDS",
-                        (0, 1),
-                        (-1, -1),
-                        [colors.whitesmoke, colors.lightgrey],
-                    ),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                    ("TOPPADDING", (0, 0), (-1, -1), 4),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ]
-            )
-        )
-        return t
+    return {
+        "income_vs_expense": income_vs_expense_rows,
+        "by_cat": by_cat_rows,
+        "by_day": by_day_rows,
+    }
 
-    pdf_buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        pdf_buffer,
-        pagesize=letter,
-        leftMargin=0.7 * inch,
-        rightMargin=0.7 * inch,
-        topMargin=0.7 * inch,
-        bottomMargin=0.7 * inch,
-    )
-    styles = getSampleStyleSheet()
-    story = []
 
-    story.append(Paragraph(f"Monthly Dashboard - {selected_label}", styles["Title"]))
+def month_section_story(
+    title: str,
+    total_income: float,
+    total_expenses: float,
+    net: float,
+    rows: dict,
+    styles,
+    title_style: str = "Title",
+) -> list:
+    story = []
+    story.append(Paragraph(title, styles[title_style]))
     story.append(Spacer(1, 0.2 * inch))
     story.append(Paragraph(f"Income: {_money(total_income)}", styles["Normal"]))
     story.append(Paragraph(f"Expenses: {_money(total_expenses)}", styles["Normal"]))
@@ -92,15 +110,41 @@ def build_dashboard_pdf_bytes(
     story.append(Spacer(1, 0.25 * inch))
 
     story.append(Paragraph("Income vs Expenses", styles["Heading2"]))
-    story.append(_make_table(income_vs_expense_rows))
+    story.append(make_table(rows["income_vs_expense"]))
     story.append(Spacer(1, 0.25 * inch))
 
     story.append(Paragraph("Spending by Category (Expenses Only)", styles["Heading2"]))
-    story.append(_make_table(by_cat_rows))
+    story.append(make_table(rows["by_cat"]))
     story.append(Spacer(1, 0.25 * inch))
 
     story.append(Paragraph("Daily Spending Trend (Expenses Only)", styles["Heading2"]))
-    story.append(_make_table(by_day_rows))
+    story.append(make_table(rows["by_day"]))
+    return story
+
+
+def build_dashboard_pdf_bytes(
+    selected_label: str,
+    total_income: float,
+    total_expenses: float,
+    net: float,
+    by_cat: pd.DataFrame,
+    by_day: pd.DataFrame,
+) -> bytes:
+
+    # Download Monthly Dashboard PDF (report)
+    rows = month_section_rows(total_income, total_expenses, by_cat, by_day)
+
+    pdf_buffer = io.BytesIO()
+    doc = new_report_doc(pdf_buffer)
+    styles = getSampleStyleSheet()
+    story = month_section_story(
+        f"Monthly Dashboard - {selected_label}",
+        total_income,
+        total_expenses,
+        net,
+        rows,
+        styles,
+    )
 
     doc.build(story)
     pdf_buffer.seek(0)
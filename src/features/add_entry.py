@@ -3,9 +3,12 @@ from datetime import date
 from typing import Optional
 
 from src.db import add_transaction
-from src.state import add_guest_transaction
+from src.instrumentation import phase, traced
+from src.state import guest_rows_left
+from src.utils.money import parse_money_cents
 
 
+@traced("add_entry")
 def render_add_entry_tab(logged_in: bool, user_id: Optional[int], categories: list[str]):
     st.subheader("Add An Entry")
 
@@ -38,34 +41,18 @@ def render_add_entry_tab(logged_in: bool, user_id: Optional[int], categories: li
         submitted = st.form_submit_button("Save")
 
     if submitted:
-        raw = (st.session_state.get("amount_input", "") or "").strip().replace(",", "")
-        raw = raw.replace("$", "")
-
-        try:
-            amount = float(raw)
-        except ValueError:
-            amount = -1
+        amount_cents = parse_money_cents(st.session_state.get("amount_input", ""))
 
         if category == " ":
             st.error("Please select a category.")
-        elif amount <= 0:
+        elif amount_cents is None:
             st.error("Enter a valid amount greater than 0 (example: 12.50).")
+        elif not logged_in and guest_rows_left() <= 0:
+            st.error("Guest sessions are limited in size. Log in to keep adding entries.")
         else:
-            if logged_in:
+            amount = amount_cents / 100
+            with phase("write"):
                 add_transaction(user_id, str(tx_date), amount, category, merchant, notes)
-            else:
-                add_guest_transaction(
-                    {
-                        "id": None,
-                        "user_id": None,
-                        "date": str(tx_date),
-                        "amount": float(amount),
-                        "category": category,
-                        "merchant": merchant.strip() or None,
-                        "notes": notes.strip() or None,
-                        "created_at": None,
-                    }
-                )
 
             st.success("Saved!")
 
@@ -2,42 +2,41 @@ import streamlit as st
 import pandas as pd
 from typing import Optional
 
-from src.db import fetch_transactions
-from src.state import get_guest_transactions
-from src.analytics import rows_to_df, monthly_summary
-from src.exports.pdf_report import build_dashboard_pdf_bytes
+from src.db import delete_budget, fetch_budget_vs_actual, fetch_budgets, fetch_transaction_months, set_budget
+from src.analytics import TREND_WINDOWS, budget_status, load_trends, monthly_summary_sql
+from src.config import CATEGORIES
+from src.instrumentation import phase, traced
+from src.query_cache import cached_query
+from src.recurring import load_recurring, mark_active
+from src.utils.dates import iso_to_display, month_label, month_map_from_keys
+from src.utils.money import fmt_cents, parse_money_cents
+from src.exports.backends import get_backend
+from src.exports.pdf_cache import (
+    build_dashboard_pdf_cached,
+    dashboard_pdf_key,
+    get_cached_dashboard_pdf,
+)
 
 
+@traced("dashboard")
 def render_dashboard_tab(logged_in: bool, user_id: Optional[int]):
     st.subheader("Monthly Dashboard")
 
-    if logged_in:
-        rows = fetch_transactions(user_id)
-    else:
-        rows = get_guest_transactions()
-
-    df = rows_to_df(rows)
+    with phase("fetch"):
+        month_map = month_map_from_keys(cached_query(user_id, fetch_transaction_months, user_id))
 
-    if df.empty:
+    if month_map.empty:
         st.info("Add some transactions first.")
     else:
-        df["month_key"] = df["date"].dt.strftime("%Y-%m")
-        df["month_label"] = df["date"].dt.strftime("%m/%Y")
-
-        month_map = (
-            df[["month_key", "month_label"]]
-            .drop_duplicates()
-            .sort_values("month_key", ascending=False)
-        )
-
         selected_label = st.selectbox("Select Month", month_map["month_label"].tolist())
         month = month_map.loc[
             month_map["month_label"] == selected_label, "month_key"
         ].iloc[0]
 
-        by_cat, by_day, total_income, total_expenses, net, _remaining = monthly_summary(
-            df, month
-        )
+        with phase("aggregate"):
+            by_cat, by_day, total_income, total_expenses, net, _remaining = cached_query(
+                user_id, monthly_summary_sql, user_id, month
+            )
 
         k1, k2, k3 = st.columns(3)
         with k1:
@@ -71,7 +70,11 @@ def render_dashboard_tab(logged_in: bool, user_id: Optional[int]):
             else:
                 st.caption("No expense data for this month.")
 
-        pdf_bytes = build_dashboard_pdf_bytes(
+        _render_budgets(user_id, month)
+
+        # PDF is built only on request and cached by content hash, so
+        # re-rendering an unchanged month costs nothing.
+        report_inputs = dict(
             selected_label=selected_label,
             total_income=total_income,
             total_expenses=total_expenses,
@@ -79,11 +82,240 @@ def render_dashboard_tab(logged_in: bool, user_id: Optional[int]):
             by_cat=by_cat,
             by_day=by_day,
         )
+        with phase("export"):
+            pdf_key = dashboard_pdf_key(**report_inputs)
+            pdf_bytes = get_cached_dashboard_pdf(pdf_key)
+
+        if pdf_bytes is None and st.button(
+            "Prepare Monthly Dashboard PDF", use_container_width=True, key=f"pdf_prepare_{pdf_key}"
+        ):
+            with st.spinner("Building PDF..."), phase("export"):
+                pdf_bytes = build_dashboard_pdf_cached(pdf_key, **report_inputs)
+
+        if pdf_bytes is not None:
+            st.download_button(
+                "Download Monthly Dashboard PDF",
+                data=pdf_bytes,
+                file_name=f"Monthly_Dashboard_{selected_label.replace('/','-')}.pdf",
+                mime="application/pdf",
+                use_container_width=True,
+            )
+
+        _render_trends(user_id, month)
+        _render_recurring(user_id)
+        _render_annual_report(user_id, month_map)
+
+
+def _render_trends(user_id: int, month: str):
+    with st.expander("Trends"):
+        # One month x category matrix for the whole history, cached until
+        # the user's data changes; every view below is a slice of it.
+        with phase("aggregate"):
+            trends = cached_query(user_id, load_trends, user_id)
+        if not trends:
+            st.caption("No trend data yet.")
+            return
+        monthly = trends["monthly"]
+
+        # Headline figures as of the month selected above
+        t1, t2, t3 = st.columns(3)
+        selected = monthly.loc[month] if month in monthly.index else monthly.iloc[-1]
+        with t1:
+            st.metric("Avg monthly spend (12 mo)", _fmt_optional_money(selected["expenses_avg_12"]))
+        with t2:
+            st.metric("Savings rate (12 mo)", _fmt_optional_pct(selected["savings_rate_12m"]))
+        with t3:
+            st.metric(f"Savings rate ({month_label(month)})", _fmt_optional_pct(selected["savings_rate"]))
+
+        scope = st.selectbox(
+            "Spending", ["All expenses"] + list(trends["category"].columns), key="trends_scope"
+        )
+        if scope == "All expenses":
+            chart = monthly[["expenses"] + [f"expenses_avg_{w}" for w in TREND_WINDOWS]]
+        else:
+            chart = pd.concat(
+                [trends["category"][scope]]
+                + [trends[f"category_avg_{w}"][scope] for w in TREND_WINDOWS],
+                axis=1,
+            )
+        chart = chart.set_axis(["Monthly"] + [f"{w}-month avg" for w in TREND_WINDOWS], axis=1)
+        chart.index = pd.to_datetime(chart.index)
+        st.line_chart(chart)
+
+        st.write("Savings rate")
+        rates = monthly[["savings_rate", "savings_rate_12m"]].set_axis(["Monthly", "12-month"], axis=1)
+        rates.index = pd.to_datetime(rates.index)
+        st.line_chart(rates)
+
+        yoy = trends["yoy"]
+        years = sorted(yoy["year"].unique(), reverse=True)
+        year = st.selectbox("Year over year", years, key="trends_yoy_year")
+        table = yoy[(yoy["year"] == year) & ((yoy["amount"] != 0) | (yoy["prev_amount"] > 0))]
+        if table["prev_amount"].isna().all():
+            st.caption(f"No full comparison year before {year}.")
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Category": table["category"],
+                    f"{year} ($)": table["amount"],
+                    f"{year - 1} same months ($)": table["prev_amount"],
+                    "Change ($)": table["change"],
+                    "Change (%)": table["change_pct"] * 100,
+                }
+            ).sort_values(f"{year} ($)", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={"Change (%)": st.column_config.NumberColumn(format="%.1f%%")},
+        )
+
+
+PERIOD_LABELS = {"weekly": "Week", "monthly": "Month", "annual": "Year"}
+
+
+def _render_recurring(user_id: int):
+    with st.expander("Subscriptions & recurring charges"):
+        with phase("aggregate"):
+            charges = mark_active(cached_query(user_id, load_recurring, user_id))
+
+        if charges.empty:
+            st.caption("No recurring charges found yet (a series needs a few regular payments).")
+            return
+
+        active = charges[charges["active"]].sort_values("next_date")
+        st.metric("Recurring spend per month", fmt_cents(int(active["monthly_cents"].sum())))
+        if not active.empty:
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "Merchant": active["merchant"],
+                        "Category": active["category"],
+                        "Every": active["period"].map(PERIOD_LABELS),
+                        "Amount ($)": active["amount_cents"] / 100,
+                        "Last charge": iso_to_display(active["last_date"]),
+                        "Next charge": iso_to_display(active["next_date"]),
+                        "Payments": active["occurrences"],
+                    }
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        ended = charges[~charges["active"]]
+        if not ended.empty:
+            st.caption(
+                "Possibly cancelled (no charge when one was due): "
+                + ", ".join(sorted(ended["merchant"].unique()))
+            )
+
+
+def _fmt_optional_money(value: float) -> str:
+    return "—" if pd.isna(value) else f"${value:,.2f}"
+
+
+def _fmt_optional_pct(value: float) -> str:
+    return "—" if pd.isna(value) else f"{value:.0%}"
+
+
+def _render_annual_report(user_id: int, month_map: pd.DataFrame):
+    with st.expander("Year-End Report"):
+        years = sorted({int(k[:4]) for k in month_map["month_key"]}, reverse=True)
+        year = st.selectbox("Year", years, key="annual_report_year")
+
+        if not st.button("Prepare Annual Report PDF", key=f"annual_prepare_{year}"):
+            return
+
+        with st.spinner("Building annual report..."), phase("export"):
+            pdf_bytes = get_backend("annual_pdf")(user_id, int(year))
 
         st.download_button(
-            "Download Monthly Dashboard PDF",
+            "Download Annual Report PDF",
             data=pdf_bytes,
-            file_name=f"Monthly_Dashboard_{selected_label.replace('/','-')}.pdf",
+            file_name=f"Annual_Report_{year}.pdf",
             mime="application/pdf",
             use_container_width=True,
         )
+
+
+BUDGET_CATEGORIES = [c for c in CATEGORIES if c != "Income"]
+
+
+def _load_budget_status(user_id: int) -> pd.DataFrame:
+    return budget_status(fetch_budget_vs_actual(user_id))
+
+
+def _render_budgets(user_id: int, month: str):
+    st.write("Budgets")
+
+    # One query + one vectorized pass covers every month; this month's
+    # progress and the overspend history are both slices of it.
+    with phase("aggregate"):
+        status = cached_query(user_id, _load_budget_status, user_id)
+    current = status[status["month"] == month]
+
+    if current.empty:
+        st.caption("No budgets apply to this month yet.")
+    else:
+        for row in current.itertuples(index=False):
+            text = f"{row.category}: ${row.actual:,.2f} of ${row.budget:,.2f}"
+            if row.over:
+                text = f"⚠️ {text} (over by ${-row.remaining:,.2f})"
+            elif row.near:
+                text = f"{text} ({row.used:.0%} used)"
+            st.progress(min(float(row.used), 1.0), text=text)
+
+    with st.expander("Manage budgets"):
+        with st.form("budget_form", clear_on_submit=True):
+            b1, b2, b3 = st.columns(3)
+            with b1:
+                category = st.selectbox("Category", BUDGET_CATEGORIES, key="budget_category")
+            with b2:
+                amount_str = st.text_input("Monthly budget ($)", placeholder="0.00", key="budget_amount")
+            with b3:
+                scope = st.radio(
+                    "Applies to",
+                    [f"Every month from {month_label(month)}", f"Only {month_label(month)}"],
+                    key="budget_scope",
+                )
+            saved = st.form_submit_button("Save budget")
+
+        if saved:
+            cents = parse_money_cents(amount_str)
+            if cents is None:
+                st.error("Enter a valid amount greater than 0 (example: 250).")
+            else:
+                set_budget(user_id, category, month, cents, recurring=scope.startswith("Every"))
+                st.rerun()
+
+        budgets = fetch_budgets(user_id)
+        if budgets:
+            labels = {
+                f"{month_label(b['month'])}{'+' if b['recurring'] else ''} · {b['category']} · "
+                f"{fmt_cents(b['budget_cents'])}": (b["month"], b["category"])
+                for b in budgets
+            }
+            r1, r2 = st.columns([3, 1], vertical_alignment="bottom")
+            with r1:
+                to_remove = st.selectbox(
+                    "Saved budgets (+ = repeats every month after)", list(labels), key="budget_remove"
+                )
+            with r2:
+                if st.button("Remove", key="budget_remove_button", use_container_width=True):
+                    delete_budget(user_id, *labels[to_remove])
+                    st.rerun()
+
+        over = status[status["over"]]
+        if not over.empty:
+            st.write("Months over budget")
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "Month": over["month"].map(month_label),
+                        "Category": over["category"],
+                        "Budget ($)": over["budget"],
+                        "Spent ($)": over["actual"],
+                        "Over by ($)": -over["remaining"],
+                    }
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
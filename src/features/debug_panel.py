@@ -0,0 +1,68 @@
+import pandas as pd
+import streamlit as st
+
+from src.db import pool_stats, write_queue_stats
+from src.exports.pdf_cache import pdf_cache_stats
+from src.instrumentation import clear_traces, is_enabled, query_stats, recent_traces, set_enabled
+from src.query_cache import query_cache_stats
+
+DEBUG_TRACE_ROWS = 50
+
+
+def render_debug_panel():
+    """Admin-only view of render/SQL timings (src.instrumentation)."""
+    with st.expander("🛠 Debug: performance"):
+        enabled = st.toggle(
+            "Collect timings",
+            value=is_enabled(),
+            help="Applies to every session on this server. Timings are also logged as JSON lines.",
+            key="debug_collect_timings",
+        )
+        if enabled != is_enabled():
+            set_enabled(enabled)
+
+        traces = recent_traces(DEBUG_TRACE_ROWS)
+        if not traces:
+            st.caption("No renders recorded yet." if enabled else "Collection is off.")
+        else:
+            renders = pd.DataFrame(
+                [
+                    {
+                        "Tab": t["name"],
+                        "At": pd.Timestamp(t["at"], unit="s").strftime("%H:%M:%S"),
+                        "Total (ms)": t["total_ms"],
+                        **{f"{k} (ms)": v for k, v in t["phases_ms"].items()},
+                        "SQL (ms)": t["sql_ms"],
+                        "Queries": t["sql_count"],
+                    }
+                    for t in traces
+                ]
+            )
+            st.write("Recent renders")
+            st.dataframe(renders, use_container_width=True, hide_index=True)
+
+            queries = pd.DataFrame(query_stats(traces)).rename(
+                columns={"sql": "SQL", "calls": "Calls", "total_ms": "Total (ms)", "rows": "Rows"}
+            )
+            st.write("Queries (slowest first)")
+            st.dataframe(queries, use_container_width=True, hide_index=True)
+
+            if st.button("Clear timings", key="debug_clear_timings"):
+                clear_traces()
+                st.rerun()
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.write("Connection pool")
+            st.json(pool_stats())
+        with c2:
+            st.write("Query cache")
+            st.json(query_cache_stats())
+        with c3:
+            st.write("PDF cache")
+            st.json(pdf_cache_stats())
+
+        queue_stats = write_queue_stats()
+        if queue_stats is not None:
+            st.write("Write-behind queue")
+            st.json(queue_stats)
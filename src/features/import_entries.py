@@ -0,0 +1,55 @@
+import streamlit as st
+from typing import Optional
+
+from src.exports.backends import get_backend
+from src.imports.bank_import import import_transactions_csv, import_transactions_ofx
+from src.instrumentation import phase, traced
+
+
+@traced("import")
+def render_import_tab(logged_in: bool, user_id: Optional[int]):
+    st.subheader("Import Bank Transactions")
+
+    if not logged_in:
+        st.info("Log in to import transactions from your bank.")
+        return
+
+    st.caption(
+        "Upload a CSV (columns like Date, Amount, Description), an OFX/QFX export, "
+        "or a Parquet account snapshot. "
+        "Rows already in your history (same date, amount and merchant) are skipped."
+    )
+
+    uploaded = st.file_uploader("Bank export", type=["csv", "ofx", "qfx", "parquet"])
+    if uploaded is None:
+        return
+
+    if not st.button("Import", type="primary"):
+        return
+
+    total_bytes = max(int(uploaded.size or 0), 1)
+    progress = st.progress(0.0, text="Importing...")
+
+    def _on_progress(stats: dict):
+        done = min(uploaded.tell() / total_bytes, 1.0)
+        progress.progress(done, text=f"Imported {stats['inserted']:,} of {stats['rows_read']:,} rows read...")
+
+    name = uploaded.name.lower()
+    try:
+        with phase("write"):
+            if name.endswith(".parquet"):
+                stats = get_backend("parquet_import")(uploaded, user_id=user_id, on_progress=_on_progress)
+            elif name.endswith((".ofx", ".qfx")):
+                stats = import_transactions_ofx(user_id, uploaded, on_progress=_on_progress)
+            else:
+                stats = import_transactions_csv(user_id, uploaded, on_progress=_on_progress)
+    except ValueError as e:
+        progress.empty()
+        st.error(str(e))
+        return
+
+    progress.progress(1.0, text="Import complete.")
+    st.success(
+        f"Imported {stats['inserted']:,} transactions "
+        f"({stats['duplicates']:,} duplicates skipped, {stats['invalid']:,} invalid rows)."
+    )
@@ -1,21 +1,35 @@
 import streamlit as st
-import pandas as pd
+from datetime import date, timedelta
 from typing import Optional
 
-from src.db import fetch_transactions, clear_user_data
-from src.analytics import rows_to_df
-from src.state import get_guest_transactions
+from src.db import (
+    clear_user_data,
+    count_transactions_filtered,
+    fetch_transaction_columns,
+    fetch_transaction_months,
+    fetch_transactions_page,
+    search_transactions,
+)
+from src.analytics import columns_to_df, rows_to_df
+from src.exports.backends import get_backend
+from src.instrumentation import phase, traced
+from src.query_cache import cached_query
+from src.state import is_admin, reset_guest_db
+from src.exports.csv_export import (
+    build_transactions_export_csv,
+    export_range_filename,
+    stream_transactions_export_csv,
+)
+from src.utils.dates import display_dates, month_bounds, month_map_from_keys
+from src.utils.money import fmt_cents_series
 
 
+@traced("transactions")
 def render_transactions_tab(logged_in: bool, user_id: Optional[int], categories: list[str]):
     st.subheader("Monthly Transactions")
 
-    if logged_in:
-        rows = fetch_transactions(user_id)
-    else:
-        rows = get_guest_transactions()
-
-    df = rows_to_df(rows)
+    with phase("fetch"):
+        month_map = month_map_from_keys(cached_query(user_id, fetch_transaction_months, user_id))
 
     colA, colB = st.columns([3, 1])
     with colB:
@@ -29,22 +43,13 @@ def render_transactions_tab(logged_in: bool, user_id: Optional[int], categories:
                     st.rerun()
         else:
             if st.button("Clear Guest Data"):
-                st.session_state["guest_transactions"] = []
+                reset_guest_db()
                 st.success("Guest data cleared.")
                 st.rerun()
 
-    if df.empty:
+    if month_map.empty:
         st.info("No transactions yet. Add your first entry in the first tab.")
     else:
-        df["month_key"] = df["date"].dt.strftime("%Y-%m")
-        df["month_label"] = df["date"].dt.strftime("%m/%Y")
-
-        month_map = (
-            df[["month_key", "month_label"]]
-            .drop_duplicates()
-            .sort_values("month_key", ascending=False)
-        )
-
         c1, c2, c3 = st.columns(3)
 
         with c1:
@@ -61,78 +66,239 @@ def render_transactions_tab(logged_in: bool, user_id: Optional[int], categories:
 
         with c3:
             search = st.text_input("Search Merchant/Notes", placeholder="Type to Filter")
+            search_all = st.checkbox(
+                "Search all months",
+                key="search_all_months",
+                help='Prefix match on every word; use "quotes" for a phrase.',
+            )
+
+        if search_all and search.strip():
+            _render_search_results(user_id, search.strip(), cat_filter)
+        else:
+            start_date, end_date = month_bounds(month_filter)
+            filters = dict(
+                start_date=start_date,
+                end_date=end_date,
+                category=None if cat_filter == "All" else cat_filter,
+                text=search.strip() or None,
+            )
+            _render_month_page(user_id, filters)
+
+            # Clean CSV export (oldest -> newest), built only on request
+            if st.button("Prepare Month CSV", key="month_csv_prepare"):
+                with phase("fetch"):
+                    month_df = cached_query(user_id, _load_month_df, user_id, **filters)
+                with phase("export"):
+                    csv_bytes, csv_filename = build_transactions_export_csv(month_df, selected_label)
+                st.download_button(
+                    "Download CSV",
+                    data=csv_bytes,
+                    file_name=csv_filename,
+                    mime="text/csv",
+                )
+
+    _render_range_export(user_id, logged_in)
+    if logged_in:
+        _render_snapshot_export(user_id)
+
+
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_OPTIONS = {"Newest first": True, "Oldest first": False}
+
+TABLE_COLUMNS = {
+    "date_display": "Date",
+    "amount": "Amount ($)",
+    "category": "Category",
+    "merchant": "Merchant",
+    "notes": "Notes",
+}
+
+
+def _render_month_page(user_id: int, filters: dict):
+    """
+    Paged month table. Pages are fetched with keyset pagination on
+    (date, id); session_state keeps the cursor that starts each page seen so
+    far, so Prev/Next never re-read earlier pages. Only the visible page is
+    formatted and sent to the browser.
+    """
+    p1, p2 = st.columns(2)
+    with p1:
+        sort_label = st.selectbox("Sort", list(SORT_OPTIONS), key="tx_sort")
+    with p2:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key="tx_page_size")
+    newest_first = SORT_OPTIONS[sort_label]
 
-        df_view = df[df["month_key"] == month_filter].copy()
+    # Any change to the filters, sort or page size starts again at page 1
+    paging_key = (user_id, tuple(sorted(filters.items())), newest_first, page_size)
+    if st.session_state.get("tx_paging_key") != paging_key:
+        st.session_state["tx_paging_key"] = paging_key
+        st.session_state["tx_page_cursors"] = [None]
+    cursors = st.session_state["tx_page_cursors"]
+    page_index = len(cursors) - 1
 
-        if cat_filter != "All":
-            df_view = df_view[df_view["category"] == cat_filter]
+    with phase("fetch"):
+        total = cached_query(user_id, count_transactions_filtered, user_id, **filters)
+        # One extra row tells us whether there is a next page
+        columns, rows = cached_query(
+            user_id,
+            fetch_transactions_page,
+            user_id,
+            **filters,
+            after=cursors[-1],
+            limit=page_size + 1,
+            newest_first=newest_first,
+        )
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if not rows:
+        st.info("No transactions match these filters.")
+        return
+
+    with phase("build"):
+        page = columns_to_df(columns, rows)
+        first = page_index * page_size + 1
+        page.index = range(first, first + len(page))
+        page.index.name = "#"
+        page["date_display"] = display_dates(page["date"])
+        page["amount"] = fmt_cents_series(page["amount_cents"])
 
-        if search.strip():
-            s = search.strip().lower()
-            df_view = df_view[
-                df_view["merchant"].fillna("").str.lower().str.contains(s)
-                | df_view["notes"].fillna("").str.lower().str.contains(s)
-            ]
+    st.dataframe(page[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS), use_container_width=True)
 
-        df_display = df_view.copy()
-        df_display["amount"] = df_display["amount"].apply(lambda x: f"${float(x):,.2f}")
+    date_idx, id_idx = columns.index("date"), columns.index("id")
+    next_cursor = (rows[-1][date_idx], rows[-1][id_idx])
 
-        df_display = (
-            df_display.sort_values("date", ascending=False)
-            .reset_index(drop=True)
+    n1, n2, n3 = st.columns([1, 4, 1])
+    with n1:
+        st.button(
+            "◀ Prev",
+            key="tx_page_prev",
+            disabled=page_index == 0,
+            on_click=lambda: cursors.pop(),
+            use_container_width=True,
         )
-        df_display.index = df_display.index + 1
-        df_display.index.name = "#"
-
-        st.dataframe(
-            df_display[
-                ["date_display", "amount", "category", "merchant", "notes"]
-            ].rename(
-                columns={
-                    "date_display": "Date",
-                    "amount": "Amount ($)",
-                    "category": "Category",
-                    "merchant": "Merchant",
-                    "notes": "Notes",
-                }
-            ),
+    with n2:
+        st.caption(f"Showing {first:,}–{first + len(rows) - 1:,} of {total:,}")
+    with n3:
+        st.button(
+            "Next ▶",
+            key="tx_page_next",
+            disabled=not has_next,
+            on_click=lambda: cursors.append(next_cursor),
             use_container_width=True,
         )
 
-        # Clean CSV export (oldest -> newest)
-        export_df = (
-            df_view.sort_values(["date", "id"], ascending=[True, True])[
-                ["date", "amount", "category", "merchant", "notes"]
-            ]
-            .copy()
-        )
 
-        export_df["date"] = pd.to_datetime(
-            export_df["date"], errors="coerce"
-        ).dt.strftime("%m/%d/%Y")
+def _load_month_df(user_id: int, **filters):
+    return columns_to_df(*fetch_transaction_columns(user_id, **filters))
 
-        export_df["amount"] = (
-            pd.to_numeric(export_df["amount"], errors="coerce")
-            .fillna(0.0)
-            .apply(lambda x: f"${x:,.2f}")
-        )
-        export_df["merchant"] = export_df["merchant"].fillna("")
-        export_df["notes"] = export_df["notes"].fillna("")
-
-        export_df = export_df.rename(
-            columns={
-                "date": "Date",
-                "amount": "Amount ($)",
-                "category": "Category",
-                "merchant": "Merchant",
-                "notes": "Notes",
-            }
+
+SEARCH_PAGE_SIZE = 50
+
+
+def _render_search_results(user_id: int, search: str, cat_filter: str):
+    page = st.number_input("Page", min_value=1, value=1, step=1, key="search_page")
+    offset = (int(page) - 1) * SEARCH_PAGE_SIZE
+
+    # One extra row tells us whether there is a next page
+    with phase("fetch"):
+        rows = cached_query(
+            user_id,
+            search_transactions,
+            user_id,
+            search,
+            category=None if cat_filter == "All" else cat_filter,
+            limit=SEARCH_PAGE_SIZE + 1,
+            offset=offset,
         )
+    has_more = len(rows) > SEARCH_PAGE_SIZE
+    rows = rows[:SEARCH_PAGE_SIZE]
+
+    if not rows:
+        st.info("No matching transactions." if page == 1 else "No more results.")
+        return
+
+    with phase("build"):
+        results = rows_to_df(rows)
+        results["amount"] = fmt_cents_series(results["amount_cents"])
+        results["date_display"] = display_dates(results["date"])
+    results.index = range(offset + 1, offset + len(results) + 1)
+    results.index.name = "#"
+
+    st.caption(
+        f"Best matches {offset + 1:,}–{offset + len(results):,}"
+        + (" (more on the next page)" if has_more else "")
+    )
+    st.dataframe(results[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS), use_container_width=True)
+
+
+def _render_range_export(user_id: int, logged_in: bool):
+    with st.expander("Export a date range"):
+        today = date.today()
+        c1, c2 = st.columns(2)
+        with c1:
+            start = st.date_input(
+                "From", value=today - timedelta(days=365), format="MM/DD/YYYY", key="export_from"
+            )
+        with c2:
+            end = st.date_input("To", value=today, format="MM/DD/YYYY", key="export_to")
 
-        safe_month = selected_label.replace("/", "-")
-        st.download_button(
-            "Download CSV",
-            data=export_df.to_csv(index=False).encode("utf-8"),
-            file_name=f"Transactions_{safe_month}.csv",
-            mime="text/csv",
+        all_accounts = False
+        if logged_in and is_admin():
+            all_accounts = st.checkbox("All accounts (admin)", key="export_all_accounts")
+
+        if start > end:
+            st.error("'From' must be on or before 'To'.")
+            return
+
+        if not st.button("Prepare CSV", key="export_prepare"):
+            return
+
+        end_exclusive = end + timedelta(days=1)
+        with st.spinner("Building export..."), phase("export"):
+            csv_file, row_count = stream_transactions_export_csv(
+                None if all_accounts else user_id, str(start), str(end_exclusive)
+            )
+
+        st.caption(f"{row_count:,} transactions.")
+        # Streamlit's media store keeps download payloads as bytes, so this is
+        # the one point where the finished file is read into memory.
+        with csv_file:
+            st.download_button(
+                "Download range CSV",
+                data=csv_file.read(),
+                file_name=export_range_filename(str(start), str(end), all_accounts),
+                mime="text/csv",
+                key="export_download",
+            )
+
+
+def _render_snapshot_export(user_id: int):
+    with st.expander("Download account snapshot (Parquet)"):
+        st.caption(
+            "Every transaction in a typed, compressed Parquet file, for backups "
+            "or analysis. Upload it on the Import tab to restore it."
         )
+        all_accounts = False
+        if is_admin():
+            all_accounts = st.checkbox("All accounts (admin)", key="snapshot_all_accounts")
+
+        if not st.button("Prepare snapshot", key="snapshot_prepare"):
+            return
+
+        scope = None if all_accounts else user_id
+        with st.spinner("Building snapshot..."), phase("export"):
+            snapshot_file, stats = get_backend("parquet_snapshot")(scope)
+
+        caption = f"{stats['written']:,} transactions."
+        if stats["skipped"]:
+            caption += f" {stats['skipped']:,} rows with an invalid date were skipped."
+        st.caption(caption)
+        with snapshot_file:
+            st.download_button(
+                "Download snapshot",
+                data=snapshot_file.read(),
+                file_name=f"{'AllAccounts' if all_accounts else 'Account'}_Snapshot_{date.today()}.parquet",
+                mime="application/vnd.apache.parquet",
+                key="snapshot_download",
+            )
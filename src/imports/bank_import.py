@@ -0,0 +1,328 @@
+import io
+import re
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from src.config import CATEGORIES
+from src.db import add_transactions_bulk, fetch_transaction_keys, max_transaction_id
+from src.utils.money import parse_money_series, to_cents_array
+
+CHUNK_SIZE = 10_000
+
+# Lower-cased header names we recognise in bank exports (first match wins).
+# Includes the headers written by our own CSV export.
+COLUMN_ALIASES = {
+    "date": ["date", "transaction date", "posted date", "posting date", "trans. date"],
+    "amount": ["amount", "amount ($)", "transaction amount"],
+    "debit": ["debit", "withdrawal", "withdrawals"],
+    "credit": ["credit", "deposit", "deposits"],
+    "category": ["category"],
+    "merchant": ["merchant", "description", "payee", "name"],
+    "notes": ["notes", "memo", "note"],
+}
+
+
+def _resolve_columns(columns) -> dict:
+    lowered = {str(c).strip().lower(): c for c in columns}
+    resolved = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                resolved[field] = lowered[alias]
+                break
+    return resolved
+
+
+def _required_columns(raw: pd.DataFrame) -> dict:
+    cols = _resolve_columns(raw.columns)
+    if "date" not in cols or not ({"amount"} <= cols.keys() or {"debit", "credit"} <= cols.keys()):
+        raise ValueError(
+            "Could not find date and amount columns. Expected headers like "
+            "'Date' and 'Amount' (or 'Debit'/'Credit')."
+        )
+    return cols
+
+
+def _signed_amounts(raw: pd.DataFrame, cols: dict) -> pd.Series:
+    """Amounts with money out negative (debit/credit columns are combined)."""
+    if "amount" in cols:
+        return parse_money_series(raw[cols["amount"]], signed=True)
+    debit = parse_money_series(raw[cols["debit"]], signed=True).abs().fillna(0.0)
+    credit = parse_money_series(raw[cols["credit"]], signed=True).abs().fillna(0.0)
+    return (credit - debit).where((credit != 0) | (debit != 0))
+
+
+def is_signed_file(raw: pd.DataFrame) -> bool:
+    """Whether a chunk (normally a file's first) has negative amounts."""
+    return bool((_signed_amounts(raw, _required_columns(raw)) < 0).any())
+
+
+def normalize_chunk(
+    raw: pd.DataFrame,
+    date_format: Optional[str] = None,
+    default_category: str = "Other",
+    signed_file: Optional[bool] = None,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Map a raw chunk (all-string columns) onto the transactions schema.
+
+    Returns (df, invalid_count) where df has columns
+    date (YYYY-MM-DD str), amount_cents (positive int64), category, merchant, notes.
+
+    Bank exports are usually signed (negative = money out). Amounts are stored
+    as positive values; when the file has no category column, positive rows of
+    a signed file are treated as Income. signed_file is decided once per file
+    (import_chunks uses is_signed_file on the first chunk) so every chunk is
+    categorized the same way; None decides from this chunk alone.
+    """
+    cols = _required_columns(raw)
+    dates = pd.to_datetime(raw[cols["date"]], format=date_format, errors="coerce")
+    amount = _signed_amounts(raw, cols)
+
+    def _text(field):
+        if field not in cols:
+            return pd.Series("", index=raw.index, dtype="string")
+        return raw[cols[field]].astype("string").fillna("").str.strip()
+
+    merchant = _text("merchant")
+    notes = _text("notes")
+
+    if "category" in cols:
+        category = _text("category")
+        category = category.where(category.isin(CATEGORIES), default_category)
+    else:
+        if signed_file is None:
+            signed_file = bool((amount < 0).any())
+        category = pd.Series(default_category, index=raw.index, dtype="string")
+        if signed_file:
+            category = category.where(~(amount > 0), "Income")
+
+    valid = dates.notna() & amount.notna() & (amount != 0)
+    out = pd.DataFrame(
+        {
+            "date": dates[valid].dt.strftime("%Y-%m-%d"),
+            "amount_cents": to_cents_array(amount[valid].abs()),
+            "category": category[valid],
+            "merchant": merchant[valid],
+            "notes": notes[valid],
+        }
+    )
+    return out, int((~valid).sum())
+
+
+def _dedupe_keys(date: pd.Series, cents: pd.Series, merchant: pd.Series) -> pd.Series:
+    return (
+        date.astype(str)
+        + "|"
+        + cents.astype("int64").astype(str)
+        + "|"
+        + merchant.fillna("").astype(str).str.strip().str.lower()
+    )
+
+
+class ExistingKeys:
+    """
+    Dedupe keys of rows that existed before the import, loaded lazily for the
+    date range the chunks have touched so far (each date is fetched once).
+
+    max_id: max_transaction_id() when the import started, so rows the import
+    itself inserts never count as existing. Use one instance per user for
+    the whole import, together with drop_existing.
+    """
+
+    def __init__(self, user_id: int, max_id: int):
+        self.user_id = user_id
+        self.max_id = max_id
+        self.start = None   # loaded range is [start, end)
+        self.end = None
+        self.keys = set()
+
+    def _load(self, start: str, end: str):
+        rows = fetch_transaction_keys(self.user_id, start, end, self.max_id)
+        if rows:
+            existing = pd.DataFrame([tuple(r) for r in rows], columns=["date", "amount_cents", "merchant"])
+            self.keys.update(_dedupe_keys(existing["date"], existing["amount_cents"], existing["merchant"]))
+
+    def cover(self, start: str, end: str):
+        if self.start is None:
+            self._load(start, end)
+            self.start, self.end = start, end
+            return
+        if start < self.start:
+            self._load(start, self.start)
+            self.start = start
+        if end > self.end:
+            self._load(self.end, end)
+            self.end = end
+
+
+def drop_existing(df: pd.DataFrame, existing: ExistingKeys) -> tuple[pd.DataFrame, int]:
+    """
+    Drop rows of df (date, amount_cents, merchant columns; one user) that
+    match a row in existing on (date, amount, merchant).
+
+    Returns (remaining_df, duplicate_count).
+    """
+    if df.empty:
+        return df, 0
+
+    end = (pd.Timestamp(df["date"].max()) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    existing.cover(df["date"].min(), end)
+    if not existing.keys:
+        return df, 0
+
+    keys = _dedupe_keys(df["date"], df["amount_cents"], df["merchant"])
+    dup = keys.isin(existing.keys)
+    return df[~dup], int(dup.sum())
+
+
+def import_chunks(
+    user_id: int,
+    chunks: Iterator[pd.DataFrame],
+    date_format: Optional[str] = None,
+    default_category: str = "Other",
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Normalize, dedupe and insert raw chunks. Each chunk is written with a
+    single executemany/commit.
+
+    Rows are deduped on (date, amount, merchant) against rows that existed
+    before the import started, so repeated rows inside one file are kept.
+    Whether the file is signed is decided from its first chunk.
+
+    Returns {"rows_read", "inserted", "duplicates", "invalid"}.
+    """
+    stats = {"rows_read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    existing = ExistingKeys(user_id, max_transaction_id())
+    signed_file = None
+
+    for raw in chunks:
+        stats["rows_read"] += len(raw)
+
+        if signed_file is None:
+            signed_file = is_signed_file(raw)
+        df, invalid = normalize_chunk(
+            raw, date_format=date_format, default_category=default_category, signed_file=signed_file
+        )
+        stats["invalid"] += invalid
+
+        df, dups = drop_existing(df, existing)
+        stats["duplicates"] += dups
+
+        stats["inserted"] += add_transactions_bulk(
+            user_id,
+            df[["date", "amount_cents", "category", "merchant", "notes"]].itertuples(index=False, name=None),
+        )
+
+        if on_progress is not None:
+            on_progress(dict(stats))
+
+    return stats
+
+
+# CSV
+def iter_csv_chunks(file, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """file: path or binary/text file-like (e.g. a Streamlit UploadedFile)."""
+    yield from pd.read_csv(
+        file,
+        chunksize=chunk_size,
+        dtype=str,
+        keep_default_na=False,
+        skipinitialspace=True,
+    )
+
+
+def import_transactions_csv(
+    user_id: int,
+    file,
+    chunk_size: int = CHUNK_SIZE,
+    date_format: Optional[str] = None,
+    default_category: str = "Other",
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    return import_chunks(
+        user_id,
+        iter_csv_chunks(file, chunk_size=chunk_size),
+        date_format=date_format,
+        default_category=default_category,
+        on_progress=on_progress,
+    )
+
+
+# OFX / QFX (SGML 1.x and XML 2.x)
+_OFX_TXN_RE = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_OFX_FIELD_RE = re.compile(r"<(DTPOSTED|TRNAMT|NAME|PAYEE|MEMO)>([^<\r\n]*)", re.IGNORECASE)
+_OFX_READ_SIZE = 1 << 20
+
+
+def iter_ofx_chunks(file, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream <STMTTRN> blocks out of an OFX file without loading it whole.
+    Yields DataFrames with Date (YYYYMMDD), Amount, Merchant and Notes columns.
+    """
+    owns_file = isinstance(file, (str, bytes)) or hasattr(file, "__fspath__")
+    if owns_file:
+        file = open(file, "rb")
+
+    wrapped = _is_binary(file)
+    reader = io.TextIOWrapper(file, encoding="latin-1") if wrapped else file
+
+    records = []
+    buf = ""
+    try:
+        while True:
+            block = reader.read(_OFX_READ_SIZE)
+            buf += block or ""
+
+            last_end = 0
+            for m in _OFX_TXN_RE.finditer(buf):
+                fields = {k.upper(): v.strip() for k, v in _OFX_FIELD_RE.findall(m.group(1))}
+                records.append(
+                    {
+                        "Date": fields.get("DTPOSTED", "")[:8],
+                        "Amount": fields.get("TRNAMT", ""),
+                        "Merchant": fields.get("NAME") or fields.get("PAYEE", ""),
+                        "Notes": fields.get("MEMO", ""),
+                    }
+                )
+                last_end = m.end()
+                if len(records) >= chunk_size:
+                    yield pd.DataFrame(records, dtype=str)
+                    records = []
+
+            # Keep only an unfinished <STMTTRN> block (or a possibly split tag).
+            start = buf.upper().find("<STMTTRN>", last_end)
+            buf = buf[start:] if start != -1 else buf[-16:]
+
+            if not block:
+                break
+    finally:
+        if wrapped:
+            reader.detach()
+        if owns_file:
+            file.close()
+
+    if records:
+        yield pd.DataFrame(records, dtype=str)
+
+
+def _is_binary(file) -> bool:
+    return "b" in getattr(file, "mode", "b") and not isinstance(file, io.TextIOBase)
+
+
+def import_transactions_ofx(
+    user_id: int,
+    file,
+    chunk_size: int = CHUNK_SIZE,
+    default_category: str = "Other",
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    return import_chunks(
+        user_id,
+        iter_ofx_chunks(file, chunk_size=chunk_size),
+        date_format="%Y%m%d",
+        default_category=default_category,
+        on_progress=on_progress,
+    )
@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.db import (
+    clear_user_data,
+    fetch_user_ids,
+    insert_transaction_rows,
+    max_transaction_id,
+)
+from src.exports.snapshot import SNAPSHOT_BATCH_ROWS
+from src.imports.bank_import import ExistingKeys, drop_existing
+
+REQUIRED_COLUMNS = ("date", "amount_cents", "category")
+OPTIONAL_COLUMNS = ("user_id", "merchant", "notes", "created_at")
+
+
+def _open(source) -> pq.ParquetFile:
+    try:
+        return pq.ParquetFile(source)
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ValueError(f"Not a Parquet snapshot: {e}") from e
+
+
+def _snapshot_user_ids(snapshot: pq.ParquetFile) -> set[int]:
+    """Distinct user ids, reading only that column."""
+    ids: set[int] = set()
+    for batch in snapshot.iter_batches(columns=["user_id"]):
+        ids.update(pc.unique(batch.column(0)).to_pylist())
+    ids.discard(None)
+    return ids
+
+
+def _batch_frame(batch: pa.RecordBatch) -> pd.DataFrame:
+    columns = {}
+    for name in batch.schema.names:
+        col = batch.column(name)
+        if name == "date":
+            col = col.cast(pa.date32()).cast(pa.string())
+        elif name == "category" and pa.types.is_dictionary(col.type):
+            col = col.dictionary_decode()
+        columns[name] = col.to_numpy(zero_copy_only=False)
+    return pd.DataFrame(columns, copy=False)
+
+
+def import_snapshot(
+    source,
+    user_id: Optional[int] = None,
+    replace: bool = False,
+    batch_rows: int = SNAPSHOT_BATCH_ROWS,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Bulk-load a Parquet snapshot (src.exports.snapshot) back into SQLite,
+    one record batch per transaction.
+
+    user_id given: every row goes to that account (restore or move one
+    account). user_id=None: rows keep their user_id, and every referenced
+    user must already exist (whole-database restore).
+
+    replace=True first clears the target accounts' data. Otherwise rows
+    matching existing ones on (date, amount, merchant) are skipped, as in
+    bank imports, so loading the same snapshot twice adds nothing.
+
+    Returns {"rows_read", "inserted", "duplicates", "invalid"}.
+    """
+    snapshot = _open(source)
+    names = set(snapshot.schema_arrow.names)
+    missing = [c for c in REQUIRED_COLUMNS if c not in names]
+    if user_id is None and "user_id" not in names:
+        missing.append("user_id")
+    if missing:
+        raise ValueError(f"Snapshot is missing columns: {', '.join(missing)}")
+
+    if user_id is None:
+        targets = _snapshot_user_ids(snapshot)
+        unknown = targets - fetch_user_ids()
+        if unknown:
+            raise ValueError(f"Snapshot references users that don't exist here: {sorted(unknown)}")
+    else:
+        targets = {user_id}
+
+    if replace:
+        for uid in targets:
+            clear_user_data(uid)
+
+    max_id = max_transaction_id()
+    existing = {uid: ExistingKeys(uid, max_id) for uid in targets}
+    imported_at = datetime.now().isoformat(timespec="seconds")
+    columns = [c for c in (*REQUIRED_COLUMNS, *OPTIONAL_COLUMNS) if c in names]
+    stats = {"rows_read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+
+    _load_batches(snapshot, columns, batch_rows, user_id, existing, imported_at, stats, on_progress)
+    return stats
+
+
+def _load_batches(snapshot, columns, batch_rows, user_id, existing, imported_at, stats, on_progress):
+    for batch in snapshot.iter_batches(batch_size=batch_rows, columns=columns):
+        stats["rows_read"] += batch.num_rows
+        df = _batch_frame(batch)
+        for name in ("merchant", "notes"):
+            if name not in df.columns:
+                df[name] = None
+        if "created_at" not in df.columns:
+            df["created_at"] = imported_at
+        df["created_at"] = df["created_at"].fillna(imported_at)
+        if user_id is not None:
+            df["user_id"] = user_id
+
+        valid = df[["user_id", *REQUIRED_COLUMNS]].notna().all(axis=1)
+        stats["invalid"] += int((~valid).sum())
+        df = df[valid]
+
+        params = []
+        for uid, part in df.groupby("user_id", sort=False):
+            part, dups = drop_existing(part, existing[int(uid)])
+            stats["duplicates"] += dups
+            cents = part["amount_cents"].to_numpy(dtype="int64")
+            params.extend(
+                zip(
+                    [int(uid)] * len(part),
+                    part["date"],
+                    (cents / 100).tolist(),
+                    cents.tolist(),
+                    part["category"],
+                    part["merchant"],
+                    part["notes"],
+                    part["created_at"],
+                )
+            )
+        stats["inserted"] += insert_transaction_rows(params)
+
+        if on_progress is not None:
+            on_progress(dict(stats))
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional
+
+logger = logging.getLogger("finance_tracker.perf")
+
+# Finished render traces kept in memory for the admin debug panel
+MAX_TRACES = 200
+SQL_TEXT_MAX = 200
+
+# Off unless FINANCE_TRACKER_INSTRUMENT is set (or an admin turns it on).
+# "debug" also logs every SQL statement. Every hook below checks this one
+# flag first, so the disabled cost is a global lookup per call.
+_env_setting = os.environ.get("FINANCE_TRACKER_INSTRUMENT", "").strip().lower()
+_enabled = _env_setting in {"1", "true", "yes", "on", "debug"}
+
+_traces: deque = deque(maxlen=MAX_TRACES)
+_traces_lock = threading.Lock()
+_local = threading.local()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(flag: bool):
+    global _enabled
+    _enabled = bool(flag)
+    if _enabled:
+        _ensure_log_handler()
+
+
+def _ensure_log_handler():
+    """JSON lines on stderr, unless logging was already configured for us."""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if _env_setting == "debug" else logging.INFO)
+    logger.propagate = False
+
+
+def _normalize_sql(sql: str) -> str:
+    text = " ".join(sql.split())
+    return text if len(text) <= SQL_TEXT_MAX else text[: SQL_TEXT_MAX - 3] + "..."
+
+
+if _enabled:
+    _ensure_log_handler()
+
+
+def _emit(event: dict):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(event, separators=(",", ":"), default=str))
+
+
+# Render traces
+@contextmanager
+def trace(name: str):
+    """
+    Time one render (e.g. a tab). Phases and SQL queries recorded on this
+    thread while the trace is open are attached to it; the finished trace is
+    kept for the debug panel and logged as one JSON line.
+    """
+    if not _enabled or getattr(_local, "trace", None) is not None:
+        yield
+        return
+
+    current = {"name": name, "phases": {}, "queries": []}
+    _local.trace = current
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.trace = None
+        total_ms = (time.perf_counter() - t0) * 1000
+        phases = current["phases"]
+        phases["render"] = max(total_ms - sum(phases.values()), 0.0)
+
+        record = {
+            "event": "render",
+            "name": name,
+            "at": time.time(),
+            "total_ms": round(total_ms, 3),
+            "phases_ms": {k: round(v, 3) for k, v in phases.items()},
+            "sql_count": len(current["queries"]),
+            "sql_ms": round(sum(q["ms"] for q in current["queries"]), 3),
+            "queries": current["queries"],
+        }
+        with _traces_lock:
+            _traces.append(record)
+        _emit({k: v for k, v in record.items() if k != "queries"})
+        if logger.isEnabledFor(logging.DEBUG):
+            for q in current["queries"]:
+                logger.debug(json.dumps({"event": "sql", "trace": name, **q}, separators=(",", ":")))
+
+
+def traced(name: str):
+    """Decorator form of trace() for render_*_tab functions."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with trace(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Attribute the enclosed time to a phase of the current trace
+    ("fetch", "build", "aggregate", "export"). No-op outside a trace.
+    """
+    current = getattr(_local, "trace", None) if _enabled else None
+    if current is None:
+        yield
+        return
+
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = current["phases"]
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+# SQL
+def start_query(sql: str) -> dict:
+    """
+    A query record, attached to the current trace (if any). The cursor adds
+    time and rows to it as the statement runs and its results are fetched.
+    """
+    record = {"sql": _normalize_sql(sql), "ms": 0.0, "rows": 0}
+    current = getattr(_local, "trace", None)
+    if current is not None:
+        current["queries"].append(record)
+    return record
+
+
+# Debug panel
+def recent_traces(limit: Optional[int] = None) -> list[dict]:
+    """Newest first."""
+    with _traces_lock:
+        items = list(_traces)
+    items.reverse()
+    return items[:limit] if limit else items
+
+
+def query_stats(traces: Optional[list[dict]] = None) -> list[dict]:
+    """Per-statement totals over the given (default: all kept) traces, slowest first."""
+    totals = {}
+    for t in traces if traces is not None else recent_traces():
+        for q in t["queries"]:
+            agg = totals.setdefault(q["sql"], {"sql": q["sql"], "calls": 0, "total_ms": 0.0, "rows": 0})
+            agg["calls"] += 1
+            agg["total_ms"] += q["ms"]
+            agg["rows"] += q["rows"]
+    return sorted(totals.values(), key=lambda a: a["total_ms"], reverse=True)
+
+
+def clear_traces():
+    with _traces_lock:
+        _traces.clear()
@@ -0,0 +1,94 @@
+"""
+Database maintenance commands.
+
+    python -m src.maintenance rebuild-rollups [--user-id N]
+    python -m src.maintenance rebuild-search
+    python -m src.maintenance annual-reports --year YYYY [--out DIR] [--workers N]
+    python -m src.maintenance detect-recurring [--user-id N]
+    python -m src.maintenance snapshot-export --out FILE [--user-id N]
+    python -m src.maintenance snapshot-import FILE [--user-id N] [--replace]
+"""
+import argparse
+
+from src.db import fts_available, init_db, rebuild_monthly_rollups, rebuild_search_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rollups = sub.add_parser("rebuild-rollups", help="Recompute monthly_rollups from transactions")
+    p_rollups.add_argument("--user-id", type=int, default=None)
+
+    sub.add_parser("rebuild-search", help="Rebuild the merchant/notes full-text index")
+
+    p_reports = sub.add_parser("annual-reports", help="Write an annual PDF report for every user")
+    p_reports.add_argument("--year", type=int, required=True)
+    p_reports.add_argument("--out", default="reports")
+    p_reports.add_argument("--workers", type=int, default=None)
+
+    p_recurring = sub.add_parser(
+        "detect-recurring", help="Detect recurring charges/subscriptions (nightly batch)"
+    )
+    p_recurring.add_argument("--user-id", type=int, default=None)
+
+    p_snap_out = sub.add_parser("snapshot-export", help="Write a Parquet snapshot of transactions")
+    p_snap_out.add_argument("--out", required=True)
+    p_snap_out.add_argument("--user-id", type=int, default=None)
+
+    p_snap_in = sub.add_parser("snapshot-import", help="Load a Parquet snapshot into this database")
+    p_snap_in.add_argument("file")
+    p_snap_in.add_argument("--user-id", type=int, default=None, help="Load every row into this account")
+    p_snap_in.add_argument("--replace", action="store_true", help="Clear the target accounts first")
+
+    args = parser.parse_args(argv)
+    init_db()
+
+    if args.command == "rebuild-rollups":
+        rebuild_monthly_rollups(args.user_id)
+        scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+        print(f"Rebuilt monthly rollups for {scope}.")
+
+    elif args.command == "rebuild-search":
+        if not fts_available():
+            print("This SQLite build has no FTS5; search uses LIKE and needs no index.")
+            return
+        rebuild_search_index()
+        print("Rebuilt the transaction search index.")
+
+    elif args.command == "annual-reports":
+        from src.exports.annual_report import generate_annual_reports
+
+        paths = generate_annual_reports(args.year, args.out, max_workers=args.workers)
+        print(f"Wrote {len(paths)} annual reports to {args.out}.")
+
+    elif args.command == "detect-recurring":
+        from src.recurring import run_recurring_batch
+
+        result = run_recurring_batch(args.user_id)
+        print(
+            f"Found {result['charges']} recurring charges for {result['users']} users "
+            f"({result['failed']} failed)."
+        )
+
+    elif args.command == "snapshot-export":
+        from src.exports.snapshot import write_snapshot
+
+        stats = write_snapshot(args.out, args.user_id)
+        print(
+            f"Wrote {stats['written']} transactions to {args.out} "
+            f"({stats['skipped']} rows with invalid dates skipped)."
+        )
+
+    elif args.command == "snapshot-import":
+        from src.imports.snapshot_import import import_snapshot
+
+        stats = import_snapshot(args.file, user_id=args.user_id, replace=args.replace)
+        print(
+            f"Imported {stats['inserted']} of {stats['rows_read']} rows "
+            f"({stats['duplicates']} duplicates skipped, {stats['invalid']} invalid)."
+        )
+
+
+if __name__ == "__main__":
+    main()
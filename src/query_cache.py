@@ -0,0 +1,145 @@
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.db import database_key, get_data_version
+
+# Total (estimated) bytes of query results kept in memory per process
+QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def estimate_bytes(value) -> int:
+    """Rough in-memory size of a cached result (DataFrames, arrays, row lists, tuples)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        size = sys.getsizeof(value)
+        for item in value:
+            if isinstance(item, (list, tuple, sqlite3.Row)):
+                size += sys.getsizeof(item) + sum(sys.getsizeof(x) for x in item)
+            else:
+                size += estimate_bytes(item)
+        return size
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    LRU of query results and DataFrames, bounded by their estimated size.
+    Keys include the user's data version (src.db.get_data_version), so a
+    write makes that user's older entries unreachable; they are dropped the
+    next time the newer version is seen instead of waiting for eviction.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict = OrderedDict()
+        self._versions: dict = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: tuple):
+        """key: (db_key, user_id, data_version, ...). Returns (found, value)."""
+        with self._lock:
+            self._note_version(key)
+            entry = self._items.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return True, entry[0]
+
+    def put(self, key: tuple, value):
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # A write landed while this result was being computed
+            if self._versions.get(key[:2], key[2]) > key[2]:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def _note_version(self, key: tuple):
+        owner, version = key[:2], key[2]
+        if self._versions.get(owner, version) < version:
+            stale = [k for k in self._items if k[:2] == owner and k[2] < version]
+            for k in stale:
+                self._bytes -= self._items.pop(k)[1]
+            self._invalidations += len(stale)
+        if self._versions.get(owner, -1) < version:
+            self._versions[owner] = version
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_query_cache = QueryCache()
+
+
+def cached_query(user_id: Optional[int], fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs), memoized per (database, user, data version). Use it
+    for reads whose result depends only on that user's transactions and
+    budgets. Results are shared across reruns, tabs and sessions of the same
+    user, so callers must not mutate them (copy first).
+    """
+    key = (
+        database_key(),
+        user_id,
+        get_data_version(user_id),
+        f"{fn.__module__}.{fn.__qualname__}",
+        args,
+        tuple(sorted(kwargs.items())),
+    )
+    found, value = _query_cache.get(key)
+    if not found:
+        value = fn(*args, **kwargs)
+        _query_cache.put(key, value)
+    return value
+
+
+def query_cache_stats() -> dict:
+    return _query_cache.stats()
+
+
+def clear_query_cache():
+    _query_cache.clear()
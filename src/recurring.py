@@ -0,0 +1,287 @@
+"""
+Recurring charge / subscription detection.
+
+Expense rows are grouped by user and normalized merchant (hash-based
+factorizing), split into amount bands by walking each group's sorted
+amounts, and each band's sorted date gaps are tested for a weekly, monthly
+or annual rhythm. Everything is a handful of sorts and vectorized passes,
+so one run over the whole transactions table is O(n log n).
+"""
+import logging
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.db import (
+    RECURRING_COLUMNS,
+    fetch_data_versions,
+    fetch_recurring_charges,
+    get_data_version,
+    iter_recurring_candidates,
+    save_recurring_charges,
+)
+from src.utils.dates import parse_iso_dates
+
+logger = logging.getLogger(__name__)
+
+# name: (expected gap in days, allowed deviation, minimum charges, months per step)
+PERIODS = {
+    "weekly": (7, 1, 4, None),
+    "monthly": (30.44, 3.5, 3, 1),
+    "annual": (365.25, 10, 2, 12),
+}
+# Share of a band's gaps that must fit the period
+MIN_REGULARITY = 0.75
+# Consecutive sorted amounts within this ratio stay in the same band
+AMOUNT_TOLERANCE = 0.15
+# Rows handed to detect_recurring at a time by the nightly batch
+DETECT_CHUNK_ROWS = 500_000
+
+RESULT_COLUMNS = ["user_id", *RECURRING_COLUMNS]
+
+
+def normalize_merchants(merchants) -> np.ndarray:
+    """
+    Lowercase, drop reference numbers (#123, runs of 4+ digits) and
+    punctuation, collapse whitespace, so "NETFLIX.COM 8841" and
+    "Netflix.com" share a key but "Store 12" and "Store 13" do not. Each
+    distinct raw value is normalized once.
+    """
+    codes, uniques = pd.factorize(pd.Series(merchants, dtype=object))
+    normalized = (
+        pd.Series(uniques, dtype=object)
+        .astype(str)
+        .str.lower()
+        .str.replace(r"#\s*\d+|\d{4,}", " ", regex=True)
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+    # Missing values get code -1, which picks the trailing ""
+    return np.append(normalized.to_numpy(dtype=object), "")[codes]
+
+
+def _day_of_month(days: np.ndarray) -> np.ndarray:
+    """0-based day of month of datetime64[D] values."""
+    return (days - days.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)
+
+
+def _add_months(days: np.ndarray, months: int, anchor_day: np.ndarray) -> np.ndarray:
+    """datetime64[D] + whole months, landing on anchor_day (0-based, clipped to month end)."""
+    target = days.astype("datetime64[M]") + months
+    month_len = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(np.int64)
+    return target.astype("datetime64[D]") + np.minimum(anchor_day, month_len - 1)
+
+
+def next_charge_dates(
+    last: np.ndarray, periods: np.ndarray, first: Optional[np.ndarray] = None, steps: int = 1
+) -> np.ndarray:
+    """
+    Forecast: `steps` periods after each last charge date (datetime64[D]).
+    Monthly/annual charges keep the billing day of the first charge, so a
+    series billed on the 31st returns to it after a short month.
+    """
+    anchor = _day_of_month(last if first is None else first)
+    out = last.copy()
+    for name, (gap, _dev, _min, months) in PERIODS.items():
+        mask = periods == name
+        if mask.any():
+            if months is None:
+                out[mask] = last[mask] + np.timedelta64(int(gap) * steps, "D")
+            else:
+                out[mask] = _add_months(last[mask], months * steps, anchor[mask])
+    return out
+
+
+def detect_recurring(user_ids, dates, amount_cents, categories, merchants) -> pd.DataFrame:
+    """
+    Parallel sequences describing expense transactions (any number of users).
+    Returns one row per detected series, RESULT_COLUMNS, dates as ISO strings.
+    Rows whose date does not parse are ignored.
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    if len(user_ids) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    days = parse_iso_dates(dates)
+    cents = np.asarray(amount_cents, dtype=np.int64)
+    merchants = np.asarray(merchants, dtype=object)
+    categories = np.asarray(categories, dtype=object)
+
+    # Rows with a malformed date are dropped
+    keep = pd.notna(merchants) & (cents > 0) & ~np.isnat(days)
+    user_ids, days, cents, merchants, categories = (
+        a[keep] for a in (user_ids, days, cents, merchants, categories)
+    )
+    normalized = normalize_merchants(merchants)
+    has_name = normalized != ""
+    user_ids, days, cents, merchants, categories, normalized = (
+        a[has_name] for a in (user_ids, days, cents, merchants, categories, normalized)
+    )
+    if len(user_ids) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    # (user, merchant) groups by hashing, then amount bands: sort each group's
+    # amounts and start a new band wherever the next amount jumps too far.
+    merchant_code, _ = pd.factorize(normalized)
+    group, _ = pd.factorize(user_ids * (int(merchant_code.max()) + 1) + merchant_code)
+    order = np.lexsort((cents, group))
+    g, c = group[order], cents[order]
+    new_band = np.ones(len(order), dtype=bool)
+    new_band[1:] = (g[1:] != g[:-1]) | (c[1:] > c[:-1] * (1 + AMOUNT_TOLERANCE))
+    band = np.empty(len(order), dtype=np.int64)
+    band[order] = np.cumsum(new_band) - 1
+    n_bands = int(band.max()) + 1
+
+    # Date gaps inside each band
+    order = np.lexsort((days, band))
+    b, d = band[order], days[order].astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    ends = np.r_[starts[1:], len(b)] - 1
+    counts = ends - starts + 1
+    same = b[1:] == b[:-1]
+    gap_band = b[1:][same]
+    gaps = (d[1:] - d[:-1])[same].astype(float)
+    median_gap = pd.Series(gaps).groupby(gap_band).median().reindex(range(n_bands)).to_numpy()
+
+    period = np.full(n_bands, "", dtype=object)
+    for name, (expected, deviation, min_count, _months) in PERIODS.items():
+        fits = np.abs(gaps - expected) <= deviation
+        fit_share = np.bincount(gap_band, weights=fits, minlength=n_bands) / np.maximum(counts - 1, 1)
+        match = (
+            (period == "")
+            & (counts >= min_count)
+            & (np.abs(median_gap - expected) <= deviation)
+            & (fit_share >= MIN_REGULARITY)
+        )
+        period[match] = name
+
+    found = np.flatnonzero(period != "")
+    if len(found) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    first_i, last_i = order[starts[found]], order[ends[found]]
+    first_day, last_day = days[first_i], days[last_i]
+    return pd.DataFrame(
+        {
+            "user_id": user_ids[last_i],
+            "merchant": merchants[last_i],
+            "category": categories[last_i],
+            "period": period[found],
+            "amount_cents": cents[last_i],
+            "occurrences": counts[found],
+            "first_date": first_day.astype(str),
+            "last_date": last_day.astype(str),
+            "next_date": next_charge_dates(last_day, period[found], first_day).astype(str),
+        }
+    )[RESULT_COLUMNS]
+
+
+def mark_active(charges: pd.DataFrame, as_of: Optional[date] = None) -> pd.DataFrame:
+    """
+    Adds `active` (the forecast charge is not overdue by more than a
+    quarter period) and `monthly_cents` (cost normalized to a month).
+    """
+    out = charges.copy()
+    today = np.datetime64(as_of or date.today(), "D")
+    gap = out["period"].map({k: v[0] for k, v in PERIODS.items()}).to_numpy(dtype=float)
+    next_day = out["next_date"].to_numpy(dtype="datetime64[D]")
+    overdue = (today - next_day).astype(np.int64)
+    out["active"] = overdue <= np.maximum(gap * 0.25, 2)
+    out["monthly_cents"] = np.round(out["amount_cents"].to_numpy(dtype=float) * PERIODS["monthly"][0] / gap)
+    return out
+
+
+def detect_recurring_for_user(user_id: int) -> pd.DataFrame:
+    """Live detection over one user's transactions (no stored results involved)."""
+    rows = [row for batch in iter_recurring_candidates(user_id) for row in batch]
+    if not rows:
+        return pd.DataFrame(columns=list(RECURRING_COLUMNS))
+    return detect_recurring(*zip(*rows))[list(RECURRING_COLUMNS)].reset_index(drop=True)
+
+
+def load_recurring(user_id: int) -> pd.DataFrame:
+    """
+    The user's recurring charges: the nightly batch's stored results when
+    they were computed from the current data, otherwise a live detection.
+    """
+    rows, version = fetch_recurring_charges(user_id)
+    if rows is not None and version == get_data_version(user_id):
+        return pd.DataFrame([tuple(r) for r in rows], columns=list(RECURRING_COLUMNS))
+    return detect_recurring_for_user(user_id)
+
+
+def run_recurring_batch(user_id: Optional[int] = None, chunk_rows: int = DETECT_CHUNK_ROWS) -> dict:
+    """
+    Nightly job: detect recurring charges for every user (or one) and store
+    them. Candidates stream from SQLite ordered by user and are detected in
+    chunks of about chunk_rows, split at user boundaries, so memory stays
+    bounded for any table size.
+
+    A user whose detection raises is skipped (and logged) rather than
+    aborting the run for everyone.
+
+    Returns {"users": N, "charges": M, "failed": F}.
+    """
+    # Versions are read first: a write that lands during the run leaves the
+    # stored results marked stale rather than wrongly current.
+    versions = fetch_data_versions()
+    results: dict = {}
+    if user_id is not None:
+        results[user_id] = (versions.get(user_id, 0), [])
+    else:
+        results.update({uid: (v, []) for uid, v in versions.items()})
+
+    failed: set = set()
+
+    def _detect_each(rows) -> pd.DataFrame:
+        """Per-user retry of a chunk that failed, so one bad ledger only loses its own results."""
+        found = []
+        user_ids = np.array([r[0] for r in rows])
+        starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+        for start, end in zip(starts, np.r_[starts[1:], len(rows)]):
+            uid = int(user_ids[start])
+            try:
+                found.append(detect_recurring(*zip(*rows[start:end])))
+            except Exception:
+                logger.exception("Recurring detection failed for user %s", uid)
+                failed.add(uid)
+        return pd.concat(found) if found else pd.DataFrame(columns=RESULT_COLUMNS)
+
+    def _detect(rows):
+        try:
+            found = detect_recurring(*zip(*rows))
+        except Exception:
+            found = _detect_each(rows)
+        for row in found.itertuples(index=False):
+            uid = int(row.user_id)
+            results.setdefault(uid, (versions.get(uid, 0), []))[1].append(
+                (row.merchant, row.category, row.period, int(row.amount_cents), int(row.occurrences),
+                 row.first_date, row.last_date, row.next_date)
+            )
+
+    pending: list = []
+    for batch in iter_recurring_candidates(user_id):
+        pending.extend(batch)
+        if len(pending) >= chunk_rows and pending[0][0] != pending[-1][0]:
+            # Keep the last (possibly incomplete) user for the next chunk
+            last_user = pending[-1][0]
+            cut = len(pending)
+            while cut > 0 and pending[cut - 1][0] == last_user:
+                cut -= 1
+            if cut > 0:
+                _detect(pending[:cut])
+                pending = pending[cut:]
+    if pending:
+        _detect(pending)
+
+    # Failed users keep their previously stored (now stale) results
+    for uid in failed:
+        results.pop(uid, None)
+    save_recurring_charges(results)
+    return {
+        "users": len(results),
+        "charges": sum(len(rows) for _, rows in results.values()),
+        "failed": len(failed),
+    }
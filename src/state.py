@@ -1,14 +1,91 @@
 import streamlit as st
 
+from src.config import GUEST_MAX_ROWS
+from src.db import (
+    count_transactions,
+    create_user,
+    database_size_bytes,
+    get_user_by_username,
+    open_memory_db,
+    use_connection,
+)
+
 
 # Guest helpers
-def get_guest_transactions():
-    return st.session_state.get("guest_transactions", [])
+# Each guest session gets its own :memory: SQLite database with the full
+# schema, so guests go through the same queries as signed-in users. It lives
+# in session_state and disappears with the session.
+GUEST_USERNAME = "guest"
+
+
+def get_guest_db():
+    """(connection, guest user_id) for this session, created on first use."""
+    guest = st.session_state.get("guest_db")
+    if guest is None:
+        conn = open_memory_db()
+        with use_connection(conn):
+            guest_id = create_user(GUEST_USERNAME, "Guest", "", "")
+        guest = (conn, guest_id)
+        st.session_state["guest_db"] = guest
+    return guest
+
+
+def reset_guest_db():
+    guest = st.session_state.pop("guest_db", None)
+    if guest is not None:
+        guest[0].close()
+
+
+def guest_rows_left() -> int:
+    """How many more rows this guest session may add (GUEST_MAX_ROWS cap)."""
+    conn, guest_id = get_guest_db()
+    with use_connection(conn):
+        return max(GUEST_MAX_ROWS - count_transactions(guest_id), 0)
+
+
+def guest_usage() -> dict:
+    """Row count and SQLite memory of this session's guest database."""
+    conn, guest_id = get_guest_db()
+    with use_connection(conn):
+        return {
+            "rows": count_transactions(guest_id),
+            "max_rows": GUEST_MAX_ROWS,
+            "bytes": database_size_bytes(),
+        }
+
+
+# Signed-in user (resolved at most once per script run)
+def begin_request():
+    """Call at the top of every script run to drop last run's cached user."""
+    st.session_state.pop("_current_user", None)
+
+
+def get_current_user():
+    """
+    The signed-in user's row as a dict, or None. Looked up in the DB once per
+    run and reused by every caller in that run.
+    """
+    username = st.session_state.get("username")
+    if st.session_state.get("authentication_status") is not True or not username:
+        return None
+
+    cached = st.session_state.get("_current_user")
+    if cached is not None and cached[0] == username:
+        return cached[1]
+
+    row = get_user_by_username(username)
+    user = dict(row) if row else None
+    st.session_state["_current_user"] = (username, user)
+    return user
 
 
-def add_guest_transaction(tx):
-    st.session_state.setdefault("guest_transactions", [])
-    st.session_state["guest_transactions"].append(tx)
+def is_admin() -> bool:
+    """Signed-in user is listed under [admin] usernames in secrets.toml."""
+    user = get_current_user()
+    if user is None:
+        return False
+    admins = st.secrets.get("admin", {}).get("usernames", [])
+    return user["username"].lower() in {a.lower() for a in admins}
 
 
 # Refresh behavior: ALWAYS default to guest
@@ -1,5 +1,15 @@
+import re
+
+import numpy as np
 import pandas as pd
 
+_MONTH_KEY_RE = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def is_month_key(key) -> bool:
+    """True for a well-formed YYYY-MM key (month keys of malformed stored dates are not)."""
+    return isinstance(key, str) and _MONTH_KEY_RE.fullmatch(key) is not None
+
 
 def build_month_map(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -7,6 +17,9 @@ def build_month_map(df: pd.DataFrame) -> pd.DataFrame:
     Returns a dataframe with month_key (YYYY-MM) and month_label (MM/YYYY),
     sorted descending by month_key.
     """
+    if df.empty:
+        return pd.DataFrame(columns=["month_key", "month_label"])
+
     tmp = df.copy()
     tmp["month_key"] = tmp["date"].dt.strftime("%Y-%m")
     tmp["month_label"] = tmp["date"].dt.strftime("%m/%Y")
@@ -17,3 +30,63 @@ def build_month_map(df: pd.DataFrame) -> pd.DataFrame:
         .sort_values("month_key", ascending=False)
     )
     return month_map
+
+
+def month_map_from_keys(month_keys: list[str]) -> pd.DataFrame:
+    """
+    Same shape as build_month_map, built from a list of YYYY-MM keys
+    (e.g. the result of src.db.fetch_transaction_months). Malformed keys
+    are left out.
+    """
+    keys = sorted({k for k in month_keys if is_month_key(k)}, reverse=True)
+    return pd.DataFrame(
+        {
+            "month_key": keys,
+            "month_label": [month_label(k) for k in keys],
+        }
+    )
+
+
+def parse_iso_dates(values) -> np.ndarray:
+    """ISO YYYY-MM-DD strings -> datetime64[D]; malformed or missing values become NaT."""
+    try:
+        # NumPy parses plain ISO dates in C, far faster than pd.to_datetime
+        return np.array(values, dtype="datetime64[D]")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce")
+        return parsed.to_numpy(dtype="datetime64[D]")
+
+
+def month_label(month_key: str) -> str:
+    """YYYY-MM -> MM/YYYY"""
+    return f"{month_key[5:7]}/{month_key[:4]}"
+
+
+def month_bounds(month_key: str) -> tuple[str, str]:
+    """
+    month_key: "YYYY-MM"
+    Returns the half-open ISO date range [start, end) covering the month,
+    suitable for index range scans on transactions.date.
+    """
+    year, month = int(month_key[:4]), int(month_key[5:7])
+    start = f"{year:04d}-{month:02d}-01"
+    if month == 12:
+        end = f"{year + 1:04d}-01-01"
+    else:
+        end = f"{year:04d}-{month + 1:02d}-01"
+    return start, end
+
+
+def iso_to_display(iso: pd.Series) -> pd.Series:
+    """YYYY-MM-DD strings -> MM/DD/YYYY by slicing (no date parsing)."""
+    iso = iso.astype(str)
+    return iso.str[5:7] + "/" + iso.str[8:10] + "/" + iso.str[:4]
+
+
+def display_dates(dates: pd.Series) -> pd.Series:
+    """
+    datetime64 column -> MM/DD/YYYY strings (NaN for NaT). Call on the rows
+    being shown only; about 3x faster than .dt.strftime.
+    """
+    iso = pd.Series(dates.to_numpy().astype("datetime64[D]").astype(str), index=dates.index)
+    return iso_to_display(iso).where(dates.notna())
@@ -1,3 +1,10 @@
+import math
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+
+
 def parse_money(raw: str) -> float | None:
     s = (raw or "").strip()
     if not s:
@@ -9,10 +16,89 @@ def parse_money(raw: str) -> float | None:
     except ValueError:
         return None
 
-    if val <= 0:
+    if not math.isfinite(val) or val <= 0:
         return None
     return val
 
 
+# Largest amount an SQLite INTEGER column can hold
+MAX_CENTS = 2**63 - 1
+
+
+def to_cents(x) -> int:
+    """Dollar amount (float/str/Decimal) -> whole cents, rounded half up."""
+    return int((Decimal(str(x)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def parse_money_cents(raw: str) -> int | None:
+    """
+    parse_money, returning integer cents (exact for typed input like "12.35").
+    None for anything unparseable, non-positive, or too large to store.
+    """
+    if parse_money(raw) is None:
+        return None
+    s = (raw or "").strip().replace(",", "").replace("$", "").strip()
+    try:
+        cents = to_cents(s)
+    except (InvalidOperation, ValueError, OverflowError):
+        return None
+    return cents if 0 < cents <= MAX_CENTS else None
+
+
+def to_cents_array(values) -> np.ndarray:
+    """Vectorized dollars -> int64 cents (NaN/unparseable -> 0)."""
+    amounts = pd.to_numeric(pd.Series(values), errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+    return np.rint(amounts * 100).astype("int64")
+
+
+def parse_money_series(raw: pd.Series, signed: bool = False) -> pd.Series:
+    """
+    Vectorized parse_money over a Series of strings.
+
+    Same cleanup rules ("$", "," and whitespace stripped). Values that fail to
+    parse become NaN. With signed=False non-positive values also become NaN
+    (like parse_money); with signed=True negatives are kept, including
+    accounting style "(12.50)".
+    """
+    s = raw.astype("string").str.strip().str.replace(r"[,$\s]", "", regex=True)
+    negative = s.str.match(r"^\(.*\)$").fillna(False).astype(bool)
+    s = s.str.strip("()")
+
+    vals = pd.to_numeric(s, errors="coerce").astype(float)
+    vals = vals.where(~negative, -vals)
+
+    if not signed:
+        vals = vals.where(vals > 0)
+    return vals
+
+
 def fmt_money(x: float) -> str:
     return f"${float(x):,.2f}"
+
+
+def fmt_cents(cents: int) -> str:
+    """Integer cents -> "$1,234.50" (same output as fmt_money)."""
+    cents = int(cents)
+    sign = "-" if cents < 0 else ""
+    return f"${sign}{abs(cents) // 100:,}.{abs(cents) % 100:02d}"
+
+
+def fmt_cents_series(cents) -> pd.Series:
+    """
+    Vectorized fmt_cents over int64 cents: "$1,234.50" (negatives as
+    "$-1,234.50"). Pure integer/string ops, no per-row Python formatting.
+    """
+    index = cents.index if isinstance(cents, pd.Series) else None
+    cents = np.asarray(cents, dtype="int64")
+    magnitude = np.abs(cents)
+
+    sign = pd.Series(np.where(cents < 0, "-", ""), index=index)
+    dollars = pd.Series(magnitude // 100, index=index).astype(str).str.replace(r"\B(?=(\d{3})+$)", ",", regex=True)
+    fraction = pd.Series(magnitude % 100, index=index).astype(str).str.zfill(2)
+    return "$" + sign + dollars + "." + fraction
+
+
+def fmt_money_series(values) -> pd.Series:
+    """Vectorized fmt_money: "$1,234.50" (negatives as "$-1,234.50")."""
+    index = values.index if isinstance(values, pd.Series) else None
+    return fmt_cents_series(pd.Series(to_cents_array(values), index=index))
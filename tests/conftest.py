@@ -0,0 +1,15 @@
+import pytest
+
+import src.db as db
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Fresh database in tmp_path with one user; yields that user's id."""
+    db.close_pool()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "finance.db")
+    db.init_db()
+    user_id = db.create_user("test_user", "Test User", "", "")
+    yield user_id
+    db.enable_write_queue(False)
+    db.close_pool()
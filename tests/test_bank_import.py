@@ -0,0 +1,24 @@
+import io
+
+import src.db as db
+from src.imports.bank_import import import_transactions_csv
+
+
+def test_signedness_is_decided_once_per_file(temp_db):
+    user_id = temp_db
+    csv = io.StringIO(
+        "Date,Amount,Description\n"
+        "2025-01-02,-5.00,Cafe\n"
+        "2025-01-03,100.00,Employer\n"
+        # Second chunk has no negative amounts
+        "2025-01-04,200.00,Employer\n"
+        "2025-01-05,300.00,Employer\n"
+    )
+    stats = import_transactions_csv(user_id, csv, chunk_size=2)
+    assert stats["inserted"] == 4
+
+    with db.get_conn() as conn:
+        rows = conn.execute(
+            "SELECT category FROM transactions WHERE user_id = ? ORDER BY date", (user_id,)
+        ).fetchall()
+    assert [r[0] for r in rows] == ["Other", "Income", "Income", "Income"]
@@ -0,0 +1,56 @@
+import src.db as db
+from src.analytics import budget_status
+
+
+def _spend(user_id, rows):
+    db.add_transactions_bulk(user_id, [(d, cents, category, "Shop", "") for d, cents, category in rows])
+
+
+def test_recurring_and_one_off_budgets(temp_db):
+    user_id = temp_db
+    _spend(
+        user_id,
+        [
+            ("2024-12-10", 999, "Dining"),            # before any budget
+            ("2025-01-10", 4000, "Dining"),
+            ("2025-01-20", 2000, "Dining"),
+            ("2025-02-10", 6000, "Dining"),
+            ("2025-03-10", 1000, "Groceries"),
+            ("2025-04-10", 7000, "Dining"),
+            ("2025-04-11", 500000, "Income"),
+        ],
+    )
+    db.set_budget(user_id, "Dining", "2025-01", 10000, recurring=True)
+    db.set_budget(user_id, "Dining", "2025-02", 5000)                    # one-off wins
+    db.set_budget(user_id, "Dining", "2025-03", 8000, recurring=True)    # takes over
+    db.set_budget(user_id, "Groceries", "2025-06", 3000)                 # month without spend
+
+    rows = [tuple(r) for r in db.fetch_budget_vs_actual(user_id)]
+    assert rows == [
+        ("2025-01", "Dining", 10000, 6000),
+        ("2025-02", "Dining", 5000, 6000),
+        ("2025-03", "Dining", 8000, 0),
+        ("2025-04", "Dining", 8000, 7000),
+        ("2025-06", "Dining", 8000, 0),
+        ("2025-06", "Groceries", 3000, 0),
+    ]
+
+    in_range = [tuple(r) for r in db.fetch_budget_vs_actual(user_id, "2025-02", "2025-03")]
+    assert [r[0] for r in in_range] == ["2025-02", "2025-03"]
+
+
+def test_budget_status_flags():
+    status = budget_status(
+        [
+            ("2025-01", "Dining", 10000, 12000),
+            ("2025-01", "Groceries", 10000, 8500),
+            ("2025-01", "Rent", 10000, 1000),
+            ("2025-01", "Gas", 0, 500),
+        ]
+    ).set_index("category")
+
+    assert status.loc["Dining", "over"] and not status.loc["Dining", "near"]
+    assert status.loc["Dining", "remaining"] == -20.0
+    assert status.loc["Groceries", "near"] and not status.loc["Groceries", "over"]
+    assert not status.loc["Rent", "near"] and not status.loc["Rent", "over"]
+    assert status.loc["Gas", "over"]
@@ -0,0 +1,61 @@
+"""Legacy rows with malformed dates must be skipped, not crash the views built on them."""
+import io
+
+import pytest
+
+import src.db as db
+from src.analytics import load_trends, monthly_summary_sql
+from src.exports.snapshot import write_snapshot
+from src.recurring import detect_recurring_for_user, run_recurring_batch
+from src.utils.dates import month_map_from_keys
+
+BAD_ROWS = [
+    ("2025-13-45", 999, "Dining", "Cafe", ""),    # unparseable month
+    ("2025-02-30", 999, "Dining", "Cafe", ""),    # valid month, no such day
+    ("2025-13-45", 1599, "Entertainment", "Netflix", ""),
+]
+
+
+@pytest.fixture
+def ledger(temp_db):
+    user_id = temp_db
+    db.add_transactions_bulk(
+        user_id,
+        [
+            ("2025-02-03", 300000, "Income", "Employer", ""),
+            ("2025-02-04", 1250, "Dining", "Cafe", ""),
+            *[(f"2025-0{m}-05", 1599, "Entertainment", "Netflix", "") for m in range(1, 5)],
+            *BAD_ROWS,
+        ],
+    )
+    return user_id
+
+
+def test_transaction_months_skip_malformed_keys(ledger):
+    months = db.fetch_transaction_months(ledger)
+    assert months == ["2025-04", "2025-03", "2025-02", "2025-01"]
+    assert month_map_from_keys(months + ["2025-13", "garba"])["month_key"].tolist() == months
+
+
+@pytest.mark.parametrize("use_rollups", [True, False])
+def test_monthly_summary_skips_malformed_days(ledger, use_rollups):
+    by_cat, by_day, income, expenses, net, _remaining = monthly_summary_sql(ledger, "2025-02", use_rollups)
+    assert [str(d) for d in by_day["day"]] == ["2025-02-04", "2025-02-05"]
+    assert income == 3000.0
+    assert expenses == 28.49
+
+
+def test_trends_skip_malformed_months(ledger):
+    trends = load_trends(ledger)
+    assert trends["monthly"].index.tolist() == ["2025-01", "2025-02", "2025-03", "2025-04"]
+
+
+def test_recurring_skips_malformed_dates(ledger):
+    assert run_recurring_batch() == {"users": 1, "charges": 1, "failed": 0}
+    found = detect_recurring_for_user(ledger)
+    assert found["merchant"].tolist() == ["Netflix"]
+    assert found["occurrences"].tolist() == [4]
+
+
+def test_snapshot_export_skips_malformed_dates(ledger):
+    assert write_snapshot(io.BytesIO(), ledger) == {"written": 6, "skipped": 3}
@@ -0,0 +1,89 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import src.db as db
+from src.analytics import monthly_summary_sql
+
+BASELINE_DB = Path(__file__).resolve().parent.parent / "data" / "finance.db"
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    db.close_pool()
+    path = tmp_path / "finance.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    monkeypatch.setattr(db, "_schema_ready_for", None)
+    yield path
+    db.close_pool()
+
+
+def _user_version(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _schema(path) -> list:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+def test_migrates_shipped_baseline_database(db_path):
+    # Work on a copy; the shipped file must stay untouched
+    shutil.copy(BASELINE_DB, db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        before = conn.execute("SELECT id, user_id, date, amount, merchant FROM transactions ORDER BY id").fetchall()
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    db.init_db()
+    assert _user_version(db_path) == db.SCHEMA_VERSION
+
+    with db.get_conn() as conn:
+        after = conn.execute(
+            "SELECT id, user_id, date, amount, merchant, amount_cents FROM transactions ORDER BY id"
+        ).fetchall()
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == users
+    assert [tuple(r)[:5] for r in after] == before
+    assert all(r["amount_cents"] == round(r["amount"] * 100) for r in after)
+
+    # Rollups, search and writes work on the migrated data
+    user_id, month = next((r[1], r[2][:7]) for r in before if r[1] is not None)
+    expected = sum(
+        round(r[3] * 100) for r in after if r[1] == user_id and r[2].startswith(month)
+    )
+    _by_cat, _by_day, income, expenses, _net, _remaining = monthly_summary_sql(user_id, month)
+    assert round((income + expenses) * 100) == expected
+
+    merchant = next(r[4] for r in before if r[1] == user_id and r[4])
+    assert db.search_transactions(user_id, merchant)
+    db.add_transaction(user_id, "2026-02-01", 1.0, "Dining", "Cafe", "")
+
+
+def test_init_db_is_idempotent(db_path):
+    db.init_db()
+    schema = _schema(db_path)
+
+    db._schema_ready_for = None
+    db.init_db()
+    assert _schema(db_path) == schema
+    assert _user_version(db_path) == db.SCHEMA_VERSION
+
+
+def test_failed_migration_rolls_back(db_path, monkeypatch):
+    db.init_db()
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER);")
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(db, "MIGRATIONS", [*db.MIGRATIONS, broken])
+    monkeypatch.setattr(db, "SCHEMA_VERSION", len(db.MIGRATIONS))
+    db._schema_ready_for = None
+    with pytest.raises(RuntimeError, match="migration failed"):
+        db.init_db()
+
+    assert _user_version(db_path) == len(db.MIGRATIONS) - 1
+    assert "half_done" not in {name for _type, name, _sql in _schema(db_path)}
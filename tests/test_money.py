@@ -0,0 +1,19 @@
+import pytest
+
+from src.utils.money import parse_money, parse_money_cents
+
+
+@pytest.mark.parametrize("raw", ["nan", "NaN", "inf", "-inf", "Infinity", "1e999", "snan"])
+def test_non_finite_amounts_are_rejected(raw):
+    assert parse_money(raw) is None
+    assert parse_money_cents(raw) is None
+
+
+@pytest.mark.parametrize("raw", ["", "abc", "0", "-5", "1e300"])
+def test_invalid_amounts_are_rejected(raw):
+    assert parse_money_cents(raw) is None
+
+
+def test_parse_money_cents_is_exact():
+    assert parse_money_cents("$1,234.35") == 123435
+    assert parse_money_cents("0.005") == 1
@@ -0,0 +1,70 @@
+from datetime import date
+
+import src.db as db
+import src.recurring as recurring
+from src.recurring import detect_recurring, load_recurring, run_recurring_batch
+
+MONTHLY = [("2025-01-05", 1599), ("2025-02-05", 1599), ("2025-03-05", 1599), ("2025-04-05", 1649)]
+
+
+def _detect(rows, user_id=1, merchant="NETFLIX.COM 8841"):
+    dates, cents = zip(*rows)
+    return detect_recurring([user_id] * len(rows), dates, cents, ["Entertainment"] * len(rows), [merchant] * len(rows))
+
+
+def test_detects_monthly_series():
+    found = _detect(MONTHLY)
+    assert len(found) == 1
+    row = found.iloc[0]
+    assert (row.period, row.occurrences, row.amount_cents) == ("monthly", 4, 1649)
+    assert (row.first_date, row.last_date, row.next_date) == ("2025-01-05", "2025-04-05", "2025-05-05")
+
+
+def test_irregular_charges_are_not_recurring():
+    rows = [("2025-01-05", 1599), ("2025-01-19", 1599), ("2025-03-30", 1599), ("2025-04-02", 1599)]
+    assert _detect(rows).empty
+
+
+def test_malformed_date_is_ignored():
+    found = _detect(MONTHLY + [("2025-13-45", 1599)])
+    assert len(found) == 1
+    assert found.iloc[0].occurrences == 4
+
+
+def _add_monthly(user_id, merchant):
+    db.add_transactions_bulk(user_id, [(d, c, "Entertainment", merchant, "") for d, c in MONTHLY])
+
+
+def test_batch_skips_a_failing_user(temp_db, monkeypatch):
+    good = temp_db
+    bad = db.create_user("bad_user", "Bad User", "", "")
+    _add_monthly(good, "Netflix")
+    _add_monthly(bad, "Spotify")
+
+    real_detect = recurring.detect_recurring
+
+    def flaky_detect(user_ids, *columns):
+        if bad in set(user_ids):
+            raise RuntimeError("bad ledger")
+        return real_detect(user_ids, *columns)
+
+    monkeypatch.setattr(recurring, "detect_recurring", flaky_detect)
+    result = run_recurring_batch()
+    assert result["failed"] == 1
+    assert result["charges"] == 1
+    assert load_recurring(good)["merchant"].tolist() == ["Netflix"]
+
+
+def test_batch_and_live_detection_survive_malformed_date(temp_db):
+    user_id = temp_db
+    _add_monthly(user_id, "Netflix")
+    with db.get_conn() as conn:
+        conn.execute(
+            "INSERT INTO transactions (user_id, date, amount, amount_cents, category, merchant, created_at) "
+            "VALUES (?, '2025-13-45', 15.99, 1599, 'Entertainment', 'Netflix', ?)",
+            (user_id, date.today().isoformat()),
+        )
+        conn.commit()
+
+    assert run_recurring_batch() == {"users": 1, "charges": 1, "failed": 0}
+    assert len(load_recurring(user_id)) == 1
@@ -0,0 +1,15 @@
+import src.db as db
+
+
+def test_rebuild_monthly_rollups_bumps_data_version(temp_db):
+    user_id = temp_db
+    other_id = db.create_user("other_user", "Other User", "", "")
+    before = db.get_data_version(user_id), db.get_data_version(other_id)
+
+    db.rebuild_monthly_rollups(user_id)
+    assert db.get_data_version(user_id) == before[0] + 1
+    assert db.get_data_version(other_id) == before[1]
+
+    db.rebuild_monthly_rollups()
+    assert db.get_data_version(user_id) == before[0] + 2
+    assert db.get_data_version(other_id) == before[1] + 1
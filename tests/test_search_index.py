@@ -0,0 +1,39 @@
+import src.db as db
+
+
+def test_init_db_restores_dropped_search_trigger(temp_db, monkeypatch):
+    user_id = temp_db
+    with db.get_conn() as conn:
+        conn.execute("DROP TRIGGER transactions_fts_ai;")
+        conn.commit()
+    db.add_transaction(user_id, "2025-01-02", 5.0, "Dining", "Blue Bottle", "")
+    assert db.search_transactions(user_id, "bottle") == []
+
+    # Next process start
+    monkeypatch.setattr(db, "_schema_ready_for", None)
+    db.init_db()
+
+    db.add_transaction(user_id, "2025-01-03", 6.0, "Dining", "Blue Bottle", "")
+    assert len(db.search_transactions(user_id, "bottle")) == 2
+
+
+def test_search_only_matches_own_rows(temp_db):
+    user_id = temp_db
+    other_id = db.create_user("other_user", "Other User", "", "")
+    db.add_transaction(user_id, "2025-01-02", 5.0, "Dining", "Blue Bottle", "")
+    db.add_transaction(other_id, "2025-01-02", 5.0, "Dining", "Blue Bottle", "")
+
+    rows = db.search_transactions(user_id, "blue")
+    assert [r["user_id"] for r in rows] == [user_id]
+    # The owner token itself is not searchable text
+    assert db.search_transactions(user_id, f"u{user_id}") == []
+
+
+def test_like_fallback_escapes_wildcards(temp_db, monkeypatch):
+    user_id = temp_db
+    db.add_transaction(user_id, "2025-01-02", 5.0, "Dining", "100% Juice", "")
+    db.add_transaction(user_id, "2025-01-03", 5.0, "Dining", "1000 Juice", "")
+    monkeypatch.setattr(db, "_fts_available", False)
+
+    assert [r["merchant"] for r in db.search_transactions(user_id, "100%")] == ["100% Juice"]
+    assert db.search_transactions(user_id, "_") == []
@@ -0,0 +1,39 @@
+import io
+
+import pyarrow.parquet as pq
+
+import src.db as db
+from src.exports.snapshot import write_snapshot
+from src.imports.snapshot_import import import_snapshot
+
+
+def test_export_skips_malformed_dates(temp_db):
+    user_id = temp_db
+    db.add_transactions_bulk(
+        user_id,
+        [
+            ("2025-01-02", 500, "Dining", "Cafe", ""),
+            ("2025-01-03", 600, "Dining", "Cafe", ""),
+        ],
+    )
+    with db.get_conn() as conn:
+        conn.execute("UPDATE transactions SET date = '2025-13-45' WHERE date = '2025-01-03';")
+        conn.commit()
+
+    out = io.BytesIO()
+    assert write_snapshot(out, user_id) == {"written": 1, "skipped": 1}
+    out.seek(0)
+    assert pq.read_table(out).column("date").to_pylist()[0].isoformat() == "2025-01-02"
+
+
+def test_snapshot_round_trip_dedupes(temp_db):
+    user_id = temp_db
+    db.add_transactions_bulk(user_id, [("2025-01-02", 500, "Dining", "Cafe", "")])
+    out = io.BytesIO()
+    write_snapshot(out, user_id)
+
+    out.seek(0)
+    assert import_snapshot(out, user_id=user_id)["duplicates"] == 1
+    out.seek(0)
+    assert import_snapshot(out, user_id=user_id, replace=True)["inserted"] == 1
+    assert db.count_transactions(user_id) == 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.analytics import _year_over_year, month_category_matrix, trend_analytics
+
+
+def test_month_category_matrix_fills_gaps_and_skips_malformed_months():
+    rows = [("2024-11", "Dining", 100), ("2025-01", "Dining", 300), ("2025-13", "Dining", 999), ("2025-01", "Rent", 50)]
+    months, categories, matrix = month_category_matrix(rows)
+    assert months == ["2024-11", "2024-12", "2025-01"]
+    assert categories == ["Dining", "Rent"]
+    assert matrix.tolist() == [[100, 0], [0, 0], [300, 50]]
+
+
+def test_trend_analytics_with_only_malformed_months_is_empty():
+    assert trend_analytics([("2025-13", "Dining", 999)]) == {}
+
+
+def test_year_over_year_compares_same_months():
+    # Mar 2024 - Feb 2025, one category: 2024 has Mar-Dec, 2025 has Jan-Feb
+    months = [f"2024-{m:02d}" for m in range(3, 13)] + ["2025-01", "2025-02"]
+    matrix = np.arange(1, 13, dtype=np.int64).reshape(12, 1) * 100
+    yoy = _year_over_year(months, ["Dining"], matrix).set_index("year")
+
+    assert yoy.loc[2024, "amount"] == pytest.approx(sum(range(1, 11)))
+    # 2023 is not in the history at all
+    assert np.isnan(yoy.loc[2024, "prev_amount"])
+    # Jan-Feb 2024 are missing, so 2025 has no like-for-like comparison
+    assert np.isnan(yoy.loc[2025, "prev_amount"])
+
+
+def test_year_over_year_partial_current_year():
+    months = [f"2024-{m:02d}" for m in range(1, 13)] + ["2025-01", "2025-02"]
+    cents = [100] * 12 + [150, 250]
+    yoy = _year_over_year(months, ["Dining"], np.array(cents, dtype=np.int64).reshape(-1, 1)).set_index("year")
+
+    # 2025 (Jan-Feb) is compared with Jan-Feb 2024 only
+    assert yoy.loc[2025, "amount"] == pytest.approx(4.0)
+    assert yoy.loc[2025, "prev_amount"] == pytest.approx(2.0)
+    assert yoy.loc[2025, "change_pct"] == pytest.approx(1.0)
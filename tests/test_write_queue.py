@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+import src.db as db
+
+
+def test_non_sqlite_error_fails_writes_and_keeps_writer_alive(temp_db, monkeypatch):
+    user_id = temp_db
+    db.enable_write_queue()
+
+    real_insert = db._insert_transactions
+
+    def broken_insert(conn, params):
+        raise RuntimeError("injected failure")
+
+    monkeypatch.setattr(db, "_insert_transactions", broken_insert)
+    pending = db.add_transaction(user_id, "2025-01-02", 5.0, "Dining", "Cafe", "", durable=False)
+    with pytest.raises(RuntimeError, match="injected failure"):
+        pending.wait(timeout=5)
+    with pytest.raises(RuntimeError, match="injected failure"):
+        db.add_transaction(user_id, "2025-01-03", 6.0, "Dining", "Cafe", "")
+
+    # The same writer thread keeps serving later submits
+    monkeypatch.setattr(db, "_insert_transactions", real_insert)
+    db.add_transaction(user_id, "2025-01-04", 7.0, "Dining", "Cafe", "")
+    assert db.count_transactions(user_id) == 1
+    assert db.write_queue_stats()["failed"] == 2
+
+
+def test_durable_wait_times_out(temp_db, monkeypatch):
+    user_id = temp_db
+    db.enable_write_queue()
+    monkeypatch.setattr(db, "WRITE_DURABLE_TIMEOUT_S", 0.01)
+    monkeypatch.setattr(db.WriteQueue, "_write", lambda self, pending: time.sleep(0.5))
+
+    with pytest.raises(TimeoutError):
+        db.add_transaction(user_id, "2025-01-02", 5.0, "Dining", "Cafe", "")